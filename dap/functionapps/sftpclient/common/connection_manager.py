@@ -1,6 +1,7 @@
 import json
 import pyodbc
 from azure.storage.blob import BlobServiceClient, ContainerClient
+from azure.storage.filedatalake import DataLakeServiceClient, FileSystemClient
 from azure.identity import DefaultAzureCredential
 from azure.keyvault.secrets import SecretClient
 from common.helper_utils import raise_error
@@ -51,6 +52,27 @@ def get_container_client(
     return container_client
 
 
+def get_file_system_client(
+    connection_string: str, container_path: str
+) -> FileSystemClient:
+    """
+    Get the Data Lake file system client object for the container location
+    provided, for accounts with hierarchical namespace enabled
+    """
+    try:
+        data_lake_service_client = DataLakeServiceClient.from_connection_string(
+            connection_string
+        )
+        file_system_client = data_lake_service_client.get_file_system_client(
+            container_path
+        )
+    except Exception as e:
+        raise_error(
+            error_string=f"Unable to get file system client. An error occurred: {e}"
+        )
+    return file_system_client
+
+
 def get_output_client(
     file_configs: list,
     file_pattern_name: str,
@@ -1,4 +1,5 @@
 from enum import Enum
+import json
 import os
 from typing import Any, Dict
 
@@ -68,6 +69,71 @@ METADATA_SQL_DB_CONNECTION_SECRET_NAME = os.environ[
     "METADATA_SQL_DB_CONNECTION_SECRET_NAME"
 ]
 STAGING_ADLS_QUEUE_NAME = os.environ["STAGING_ADLS_QUEUE_NAME"]
+ADLS_HNS_ENABLED = os.environ.get("ADLS_HNS_ENABLED", "false")
+MAX_SOURCE_FILE_SIZE = int(os.environ.get("MAX_SOURCE_FILE_SIZE", 0))
+
+# Leading bytes of a file read for content validations
+VALIDATION_SAMPLE_SIZE = 2 * 1024 * 1024
+ENCODING_DETECTION_SAMPLE_SIZE = 64 * 1024
+CSV_DIALECT_CHECK_ROWS = 100
+EXCEL_PREVIEW_ROWS = 5
+
+# Blob transfer tuning
+DOWNLOAD_MAX_CONCURRENCY = int(os.environ.get("DOWNLOAD_MAX_CONCURRENCY", 4))
+DOWNLOAD_BLOCK_SIZE = int(os.environ.get("DOWNLOAD_BLOCK_SIZE", 8 * 1024 * 1024))
+UPLOAD_MAX_CONCURRENCY = int(os.environ.get("UPLOAD_MAX_CONCURRENCY", 4))
+UPLOAD_BLOCK_SIZE = int(os.environ.get("UPLOAD_BLOCK_SIZE", 8 * 1024 * 1024))
+ZIP_EXTRACT_CHUNK_SIZE = int(
+    os.environ.get("ZIP_EXTRACT_CHUNK_SIZE", 100 * 1024 * 1024)
+)
+# Members of a zip processed at once, and the memory their conversions may
+# hold per archive, estimated as ZIP_MEMORY_PER_BYTE times the member size
+ZIP_MAX_WORKERS = int(os.environ.get("ZIP_MAX_WORKERS", 4))
+ZIP_MEMORY_BUDGET = int(os.environ.get("ZIP_MEMORY_BUDGET", 2 * 1024 * 1024 * 1024))
+ZIP_MEMORY_PER_BYTE = float(os.environ.get("ZIP_MEMORY_PER_BYTE", 3))
+SYNC_COPY_MAX_SIZE = int(os.environ.get("SYNC_COPY_MAX_SIZE", 5000 * 1024 * 1024))
+COPY_STATUS_POLL_INTERVAL = int(os.environ.get("COPY_STATUS_POLL_INTERVAL", 5))
+BLOB_BATCH_MAX_SIZE = 256
+# Transferred source blobs are deleted once this many are confirmed, a source
+# left behind by a run that stops first is in the tracker and only has its
+# transfer completed by the next run
+SOURCE_DELETE_FLUSH_SIZE = int(
+    os.environ.get("SOURCE_DELETE_FLUSH_SIZE", BLOB_BATCH_MAX_SIZE)
+)
+
+# CSV to parquet conversion
+STRING_DTYPE = "string[pyarrow]"
+
+# Audit columns are written as "columns", "dictionary" or file "metadata"
+AUDIT_COLUMNS_MODE = os.environ.get("AUDIT_COLUMNS_MODE", "columns")
+
+# Parquet writer profile, overridden per file pattern by "parquet_writer"
+PARQUET_WRITER_OPTIONS = json.loads(
+    os.environ.get("PARQUET_WRITER_OPTIONS", '{"compression": "snappy"}')
+)
+PARQUET_WRITER_OPTION_KEYS = (
+    "compression",
+    "compression_level",
+    "row_group_size",
+    "use_dictionary",
+    "data_page_size",
+    "dictionary_pagesize_limit",
+    "write_statistics",
+    "write_page_index",
+    "part_max_size",
+    "part_max_rows",
+)
+PARQUET_DEFAULT_ROW_GROUP_SIZE = 1024 * 1024
+CSV_READER_ENGINE = os.environ.get("CSV_READER_ENGINE", "pandas")
+CSV_STREAMING_ENABLED = os.environ.get("CSV_STREAMING_ENABLED", "false")
+CSV_COUNT_CHUNK_SIZE = 16 * 1024 * 1024
+CSV_STREAMING_BATCH_ROWS = int(os.environ.get("CSV_STREAMING_BATCH_ROWS", 100000))
+
+# Excel reader, "pandas" reads with openpyxl/xlrd and "calamine" reads the
+# sheet once and writes it in batches of EXCEL_BATCH_ROWS rows
+EXCEL_READER_ENGINE = os.environ.get("EXCEL_READER_ENGINE", "pandas")
+EXCEL_BATCH_ROWS = int(os.environ.get("EXCEL_BATCH_ROWS", 100000))
+EXCEL_MAX_SHEET_WORKERS = int(os.environ.get("EXCEL_MAX_SHEET_WORKERS", 4))
 
 # Constants for scan results
 MALWARE_SCANNING_TAG = "Malware Scanning scan result"
@@ -94,6 +160,11 @@ PROCESS_ACTIVITY_CONFIG = {
     "header_count": int,
     "row_count": int,
     "is_split_file": bool,
+    "parquet_file_size": int,
+    "uncompressed_size": int,
+    "compression": str,
+    "parquet_file_names": list,
+    "sheets": list,
 }
 
 ACTIVITIES_CONFIG: Dict[str, Dict[str, Any]] = {
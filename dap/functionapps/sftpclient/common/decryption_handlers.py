@@ -1,6 +1,7 @@
 import base64
 import pgpy
 import tempfile
+from typing import Optional
 from azure.storage.blob import BlobClient
 from common.logger_utils import logger
 from common.exception_handlers import raise_error
@@ -21,10 +22,15 @@ from common.helper_utils import create_activity_ref_details
 
 
 def decrypt_pgp(
-    source_blob_client: BlobClient, file_name: str, source_name: str, source_type: str
+    source_blob_client: BlobClient,
+    file_name: str,
+    source_name: str,
+    source_type: str,
+    source_temp_file_name: Optional[str] = None,
 ) -> tuple[str, int]:
     """
-    decrypt the pgp file
+    decrypt the pgp file, reading the encrypted payload from source_temp_file_name
+    when it has already been downloaded
     """
     try:
         file_name_pgp = file_name + ".pgp"
@@ -46,9 +52,12 @@ def decrypt_pgp(
         )
         pgp_key_updated = base64.b64decode(PRIVATE_KEY_EMA_PGP)
         private_key, _ = pgpy.PGPKey.from_blob(pgp_key_updated)
-        encrypted_message = pgpy.PGPMessage.from_blob(
-            source_blob_client.download_blob().readall()
-        )
+        if source_temp_file_name:
+            encrypted_message = pgpy.PGPMessage.from_file(source_temp_file_name)
+        else:
+            encrypted_message = pgpy.PGPMessage.from_blob(
+                source_blob_client.download_blob().readall()
+            )
         with private_key.unlock(""):
             decrypted_message = private_key.decrypt(encrypted_message).message
             if ".csv" in file_name:
@@ -63,3 +63,11 @@ class InvalidZIPFileNameException(FileValidationException):
 
 class InvalidFileAsPerConfigException(FileValidationException):
     pass
+
+
+class UnsupportedFileTypeException(FileValidationException):
+    pass
+
+
+class FileSizeLimitExceededException(FileValidationException):
+    pass
@@ -5,26 +5,93 @@ import base64
 import time
 import pgpy
 import tempfile
-from datetime import datetime
-from typing import Any, Literal
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Literal, Optional
 from zoneinfo import ZoneInfo
 from io import StringIO
-from azure.storage.blob import BlobClient, ContainerClient
-from azure.core.exceptions import HttpResponseError
+from azure.storage.blob import (
+    BlobClient,
+    BlobProperties,
+    BlobSasPermissions,
+    ContainerClient,
+    generate_blob_sas,
+)
+from azure.storage.filedatalake import FileSystemClient
+from azure.core import MatchConditions
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
 from common.logger_utils import logger
-from common.constants import PUBLIC_KEY_EMA_PGP, TRACKER_FILE_NAME, ACTIVITIES_CONFIG
+from common.constants import (
+    PUBLIC_KEY_EMA_PGP,
+    TRACKER_FILE_NAME,
+    ACTIVITIES_CONFIG,
+    DOWNLOAD_MAX_CONCURRENCY,
+    DOWNLOAD_BLOCK_SIZE,
+    SYNC_COPY_MAX_SIZE,
+    COPY_STATUS_POLL_INTERVAL,
+    BLOB_BATCH_MAX_SIZE,
+    SOURCE_DELETE_FLUSH_SIZE,
+)
 from common.exception_handlers import raise_error
 
 
-def create_temp_file(source_blob_client: BlobClient) -> tuple[str, int]:
+def create_temp_file(
+    source_blob_client: BlobClient,
+    downloaded_data: Optional[bytes] = None,
+    blob_properties: Optional[BlobProperties] = None,
+) -> str:
     """
-    Get temp file data
+    Download the blob into a preallocated temp file, fetching byte ranges of
+    DOWNLOAD_BLOCK_SIZE with up to DOWNLOAD_MAX_CONCURRENCY parallel requests.
+    Every range is pinned to the etag of the blob properties. downloaded_data
+    is the head of the blob already read along with blob_properties, it is
+    written as the first range and only the rest of the blob is requested.
     """
     try:
+        start_time = time.perf_counter()
+        if blob_properties is None:
+            blob_properties = source_blob_client.get_blob_properties()
+            blob_size = blob_properties.size
+        else:
+            # The size of a ranged download is that of the range
+            blob_size = int(blob_properties.content_range.split("/")[-1])
+        downloaded_data = downloaded_data or b""
         with tempfile.NamedTemporaryFile(delete=False) as temp_file:
             temp_file_name = temp_file.name
-            for chunk in source_blob_client.download_blob().chunks():
-                temp_file.write(chunk)
+            temp_file.write(downloaded_data)
+            temp_file.truncate(blob_size)
+
+        def download_range(offset: int) -> int:
+            length = min(DOWNLOAD_BLOCK_SIZE, blob_size - offset)
+            data = source_blob_client.download_blob(
+                offset=offset,
+                length=length,
+                etag=blob_properties.etag,
+                match_condition=MatchConditions.IfNotModified,
+            ).readall()
+            with open(temp_file_name, "r+b") as range_file:
+                range_file.seek(offset)
+                range_file.write(data)
+            return len(data)
+
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_MAX_CONCURRENCY) as executor:
+            downloaded_bytes = len(downloaded_data) + sum(
+                executor.map(
+                    download_range,
+                    range(len(downloaded_data), blob_size, DOWNLOAD_BLOCK_SIZE),
+                )
+            )
+
+        elapsed_time = time.perf_counter() - start_time
+        throughput = downloaded_bytes / (1024 * 1024) / max(elapsed_time, 1e-6)
+        logger.info(
+            "Downloaded %s (%d bytes) in %.2fs at %.2f MB/s using %d workers.",
+            source_blob_client.blob_name,
+            downloaded_bytes,
+            elapsed_time,
+            throughput,
+            DOWNLOAD_MAX_CONCURRENCY,
+        )
         return temp_file_name
 
     except Exception as e:
@@ -140,23 +207,100 @@ def create_activity_ref_details(activity_type: str, **kwargs: Any) -> str:
     return json.dumps(activity_ref_details)
 
 
-def cleanup_empty_directories(container_client: ContainerClient, blob_name: str):
+def is_directory_empty(container_client: ContainerClient, directory_path: str) -> bool:
     """
-    Check and delete empty directories in the source container.
+    Check if a directory is empty, listing at most one blob under it.
     """
-    directory_path = "/".join(blob_name.split("/")[:-1])
-    while directory_path:
-        blobs_in_directory = list(
-            container_client.list_blobs(name_starts_with=directory_path + "/")
+    blobs_in_directory = container_client.list_blobs(
+        name_starts_with=directory_path + "/", results_per_page=1
+    )
+    return next(iter(blobs_in_directory), None) is None
+
+
+def cleanup_empty_directories(
+    container_client: ContainerClient, blob_names: list[str]
+) -> None:
+    """
+    Check and delete the directories left empty by the processed blobs in the
+    source container. Directories are checked deepest level first and the
+    empty ones of each level are deleted in one batch, after which their
+    parent directories are checked in turn.
+    """
+    directories = {
+        "/".join(blob_name.split("/")[:-1])
+        for blob_name in blob_names
+        if "/" in blob_name
+    }
+    while directories:
+        depth = max(directory.count("/") for directory in directories)
+        level_directories = sorted(
+            directory for directory in directories if directory.count("/") == depth
         )
+        directories.difference_update(level_directories)
+
+        empty_directories = []
+        for directory_path in level_directories:
+            if is_directory_empty(container_client, directory_path):
+                logger.info(f"Cleaning up empty directory: {directory_path}")
+                empty_directories.append(directory_path)
+            else:
+                logger.info(
+                    f"Directory {directory_path} is not empty. No cleanup needed."
+                )
+
+        directories.update(
+            directory_path.rsplit("/", 1)[0]
+            for directory_path in empty_directories
+            if "/" in directory_path
+        )
+        delete_blobs_in_batches(container_client, empty_directories)
 
-        if not blobs_in_directory:
-            logger.info(f"Cleaning up empty directory: {directory_path}")
-            container_client.delete_blob(directory_path)
-        else:
-            logger.info(f"Directory {directory_path} is not empty. No cleanup needed.")
-            break
-        directory_path = "/".join(directory_path.split("/")[:-1])
+
+def delete_empty_directory_hns(
+    file_system_client: FileSystemClient, directory_path: str
+) -> bool:
+    """
+    Delete a directory on a hierarchical namespace account if it is empty.
+    The path is deleted non-recursively, so the service itself refuses to
+    remove a directory that still has children.
+    """
+    try:
+        file_system_client.get_file_client(directory_path).delete_file(recursive=False)
+    except HttpResponseError as e:
+        if e.error_code == "DirectoryNotEmpty":
+            return False
+        raise
+    return True
+
+
+def cleanup_empty_directories_hns(
+    file_system_client: FileSystemClient, blob_names: list[str]
+) -> None:
+    """
+    Delete the directories left empty by the processed files in the source
+    file system with directory operations, deepest level first, checking the
+    parent directories of the removed ones in turn.
+    """
+    directories = {
+        "/".join(blob_name.split("/")[:-1])
+        for blob_name in blob_names
+        if "/" in blob_name
+    }
+    while directories:
+        depth = max(directory.count("/") for directory in directories)
+        level_directories = sorted(
+            directory for directory in directories if directory.count("/") == depth
+        )
+        directories.difference_update(level_directories)
+        for directory_path in level_directories:
+            if delete_empty_directory_hns(file_system_client, directory_path):
+                logger.info(f"Cleaned up empty directory: {directory_path}")
+                if "/" in directory_path:
+                    directories.add(directory_path.rsplit("/", 1)[0])
+            else:
+                logger.info(
+                    f"Directory {directory_path} is not empty. No cleanup needed."
+                )
 
 
 def encrypt_and_upload(
@@ -189,53 +333,240 @@ def move_blob(
     source_blob_client: BlobClient,
     destination_blob_client: BlobClient,
     file_name: str,
+    temp_file_name: Optional[str] = None,
 ):
     """
     Move a blob from source to destination container.
+    If temp_file_name holds the already downloaded blob it is reused and
+    left for the caller to remove, otherwise the blob is downloaded here.
     """
-    temp_file_name = create_temp_file(source_blob_client=source_blob_client)
+    downloaded = temp_file_name is None
+    if downloaded:
+        temp_file_name = create_temp_file(source_blob_client=source_blob_client)
     logger.info(f"Encrypting and Archiving  {file_name}")
     encrypt_and_upload(temp_file_name, file_name, destination_blob_client)
     source_blob_client.delete_blob()
-    os.remove(temp_file_name)
+    if downloaded:
+        os.remove(temp_file_name)
     logger.info(f"Archiving completed for {file_name}")
 
 
+def get_source_blob_url(source_blob_client: BlobClient) -> str:
+    """
+    Get the source blob url for a copy from url. Synchronous copies need the
+    source to be authorised, so a short lived read SAS is appended when the
+    client was created with an account key.
+    """
+    account_key = getattr(source_blob_client.credential, "account_key", None)
+    if not account_key:
+        return source_blob_client.url
+    sas_token = generate_blob_sas(
+        account_name=source_blob_client.account_name,
+        container_name=source_blob_client.container_name,
+        blob_name=source_blob_client.blob_name,
+        account_key=account_key,
+        permission=BlobSasPermissions(read=True),
+        expiry=datetime.now(timezone.utc) + timedelta(hours=1),
+    )
+    return f"{source_blob_client.url}?{sas_token}"
+
+
 def transfer_blob(
     source_container_client: ContainerClient,
     target_container_client: ContainerClient,
     source_blob_name: str,
     operation_type: Literal["archive", "reject"],
+    source_blob_size: int,
+    transferred_blobs: list[str],
+    pending_transfers: list[tuple[str, BlobClient, str]],
 ) -> None:
     """
-    Archive a blob by copying it to the archive container, checking the copy status,
-    and deleting the source blob after successful archiving.
+    Copy a blob to the archive or rejected container.
+    Blobs up to SYNC_COPY_MAX_SIZE are copied synchronously server side and
+    added to transferred_blobs. Larger blobs start an asynchronous copy which
+    is added to pending_transfers and completed by complete_blob_transfers.
+    Once SOURCE_DELETE_FLUSH_SIZE sources are transferred the pending copies
+    are checked and the confirmed sources deleted in batches.
     """
     source_blob_client = source_container_client.get_blob_client(source_blob_name)
-    source_blob_url = source_blob_client.url
     target_blob_client = target_container_client.get_blob_client(source_blob_name)
 
     try:
-        target_blob_client.start_copy_from_url(source_blob_url)
-        while True:
-            props = target_blob_client.get_blob_properties()
-            if props.copy.status == "success":
-                logger.info(
-                    "Blob %s %s successfully.", source_blob_name, operation_type
-                )
-                source_blob_client.delete_blob()
-                logger.info("Blob %s deleted from source container.", source_blob_name)
-                break
-            elif props.copy.status == "pending":
-                time.sleep(1)
-            else:
-                raise HttpResponseError(
-                    f"{operation_type.capitalize()} failed for {source_blob_name} status: {props.copy.status}"
-                )
+        if source_blob_size <= SYNC_COPY_MAX_SIZE:
+            target_blob_client.upload_blob_from_url(
+                get_source_blob_url(source_blob_client), overwrite=True
+            )
+            logger.info("Blob %s %s successfully.", source_blob_name, operation_type)
+            transferred_blobs.append(source_blob_name)
+        else:
+            target_blob_client.start_copy_from_url(source_blob_client.url)
+            logger.info("Blob %s %s copy started.", source_blob_name, operation_type)
+            pending_transfers.append(
+                (source_blob_name, target_blob_client, operation_type)
+            )
     except HttpResponseError as e:
         logger.error("Error during blob transfer: %s", e)
         raise
 
+    if len(transferred_blobs) >= SOURCE_DELETE_FLUSH_SIZE:
+        check_blob_transfers(transferred_blobs, pending_transfers)
+        delete_blobs_in_batches(source_container_client, transferred_blobs)
+
+
+def resume_blob_transfer(
+    source_container_client: ContainerClient,
+    target_container_client: ContainerClient,
+    source_blob_name: str,
+    operation_type: Literal["archive", "reject"],
+    source_blob_size: int,
+    transferred_blobs: list[str],
+    pending_transfers: list[tuple[str, BlobClient, str]],
+) -> None:
+    """
+    Complete the transfer of a blob a previous run processed but stopped
+    before deleting. A copy already in the target is not made again, the
+    source is only queued for deletion, or for its pending copy to complete.
+    """
+    target_blob_client = target_container_client.get_blob_client(source_blob_name)
+    try:
+        properties = target_blob_client.get_blob_properties()
+    except ResourceNotFoundError:
+        properties = None
+    copy_status = properties.copy.status if properties else None
+    if copy_status == "pending":
+        pending_transfers.append((source_blob_name, target_blob_client, operation_type))
+    elif (
+        properties
+        and copy_status in (None, "success")
+        and (properties.size == source_blob_size)
+    ):
+        logger.info("Blob %s already %s.", source_blob_name, operation_type)
+        transferred_blobs.append(source_blob_name)
+    else:
+        transfer_blob(
+            source_container_client=source_container_client,
+            target_container_client=target_container_client,
+            source_blob_name=source_blob_name,
+            operation_type=operation_type,
+            source_blob_size=source_blob_size,
+            transferred_blobs=transferred_blobs,
+            pending_transfers=pending_transfers,
+        )
+
+
+def rename_path(
+    source_file_system_client: FileSystemClient,
+    target_file_system_client: FileSystemClient,
+    source_path: str,
+    operation_type: Literal["archive", "reject"],
+    created_directories: set[tuple[str, str]],
+) -> None:
+    """
+    Archive or reject a file on a hierarchical namespace account with an
+    atomic rename into the target file system. The parent directory is
+    created in the target once per run, tracked in created_directories.
+    """
+    target_file_system_name = target_file_system_client.file_system_name
+    parent_directory = "/".join(source_path.split("/")[:-1])
+    if (
+        parent_directory
+        and (target_file_system_name, parent_directory) not in created_directories
+    ):
+        target_file_system_client.get_directory_client(
+            parent_directory
+        ).create_directory()
+        created_directories.add((target_file_system_name, parent_directory))
+
+    try:
+        source_file_system_client.get_file_client(source_path).rename_file(
+            f"{target_file_system_name}/{source_path}"
+        )
+        logger.info("Blob %s %s successfully.", source_path, operation_type)
+    except HttpResponseError as e:
+        logger.error("Error during blob rename: %s", e)
+        raise
+
+
+def complete_blob_transfers(
+    source_container_client: ContainerClient,
+    transferred_blobs: list[str],
+    pending_transfers: list[tuple[str, BlobClient, str]],
+) -> None:
+    """
+    Wait for the pending asynchronous copies, checking all of them in each
+    round, and delete every successfully transferred blob from the source
+    container in batches.
+    """
+    while pending_transfers:
+        check_blob_transfers(transferred_blobs, pending_transfers)
+        if pending_transfers:
+            time.sleep(COPY_STATUS_POLL_INTERVAL)
+
+    delete_blobs_in_batches(source_container_client, transferred_blobs)
+
+
+def check_blob_transfers(
+    transferred_blobs: list[str],
+    pending_transfers: list[tuple[str, BlobClient, str]],
+) -> None:
+    """
+    Check the status of each pending asynchronous copy once, moving the
+    successful ones to transferred_blobs and dropping the failed ones.
+    """
+    still_pending = []
+    for source_blob_name, target_blob_client, operation_type in pending_transfers:
+        copy_status = target_blob_client.get_blob_properties().copy.status
+        if copy_status == "success":
+            logger.info("Blob %s %s successfully.", source_blob_name, operation_type)
+            transferred_blobs.append(source_blob_name)
+        elif copy_status == "pending":
+            still_pending.append((source_blob_name, target_blob_client, operation_type))
+        else:
+            logger.error(
+                "%s failed for %s status: %s",
+                operation_type.capitalize(),
+                source_blob_name,
+                copy_status,
+            )
+    pending_transfers[:] = still_pending
+
+
+def delete_blobs_in_batches(
+    container_client: ContainerClient, blob_names: list[str]
+) -> None:
+    """
+    Delete blobs through the Blob Batch API, BLOB_BATCH_MAX_SIZE blobs per
+    request, and empty the list. Falls back to deleting one blob at a time
+    where the account does not support batch requests.
+    """
+    for start in range(0, len(blob_names), BLOB_BATCH_MAX_SIZE):
+        batch = blob_names[start : start + BLOB_BATCH_MAX_SIZE]
+        try:
+            responses = container_client.delete_blobs(
+                *batch, raise_on_any_failure=False
+            )
+            failed_blobs = [
+                blob_name
+                for blob_name, response in zip(batch, responses)
+                if response.status_code not in (202, 404)
+            ]
+        except HttpResponseError as e:
+            logger.warning(
+                "Batch delete not available, deleting blobs individually: %s", e
+            )
+            failed_blobs = []
+            for blob_name in batch:
+                try:
+                    container_client.delete_blob(blob_name)
+                except HttpResponseError:
+                    failed_blobs.append(blob_name)
+        for blob_name in failed_blobs:
+            logger.error("Unable to delete blob %s from source container.", blob_name)
+        logger.info(
+            "Deleted %d blobs from source container.", len(batch) - len(failed_blobs)
+        )
+    blob_names.clear()
+
 
 def get_file_configs(all_file_configs: dict, source_file_type: str) -> list[dict]:
     """
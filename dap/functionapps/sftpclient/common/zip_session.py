@@ -0,0 +1,282 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+import zlib
+from concurrent.futures import CancelledError
+from contextlib import contextmanager, suppress
+from typing import BinaryIO, Dict, Iterator, List, Optional, Union
+import pyzipper
+from common.constants import VALIDATION_SAMPLE_SIZE, ZIP_EXTRACT_CHUNK_SIZE
+from common.exception_handlers import InvalidFileCompressionException
+
+
+class MemberReader(io.RawIOBase):
+    """
+    Raw stream over a zip member from its start, replaying the sample of the
+    member before continuing its decompression. A member that fails to
+    decompress, including on a CRC mismatch at its end, is rejected.
+    """
+
+    def __init__(
+        self, sample: bytes, stream: pyzipper.zipfile.ZipExtFile, file_name: str
+    ):
+        self._sample = memoryview(sample)
+        self._stream = stream
+        self._file_name = file_name
+        self._offset = 0
+        self.past_sample = False
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._offset
+
+    def readinto(self, buffer) -> int:
+        if self._offset < len(self._sample):
+            size = min(len(buffer), len(self._sample) - self._offset)
+            buffer[:size] = self._sample[self._offset : self._offset + size]
+        else:
+            try:
+                data = self._stream.read(len(buffer))
+            except (pyzipper.BadZipFile, zlib.error) as e:
+                raise corrupt_member_exception(self._file_name, e)
+            size = len(data)
+            buffer[:size] = data
+            # Reading at the end of the member keeps the sample replayable
+            self.past_sample = self.past_sample or size > 0
+        self._offset += size
+        return size
+
+
+class ZipSession:
+    """
+    A zip archive opened once for its validations and processing. Each member
+    is decompressed a single time: the validation sample is the head of the
+    member stream, and reading the member replays the sample and continues
+    the same stream, with the CRC of the member checked when its stream ends.
+    Members that pass validation are indexed by name with their file pattern.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.valid_members: Dict[str, str] = {}
+        self._zip_ref: Optional[pyzipper.AESZipFile] = None
+        self._streams: Dict[str, pyzipper.zipfile.ZipExtFile] = {}
+        self._samples: Dict[str, bytes] = {}
+        self._readers: Dict[str, MemberReader] = {}
+        self._extracted: Dict[str, str] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def zip_ref(self) -> pyzipper.AESZipFile:
+        """The open archive, its central directory is read on first use."""
+        if self._zip_ref is None:
+            self._zip_ref = pyzipper.AESZipFile(self.file_path, "r")
+        return self._zip_ref
+
+    def members(self) -> List[pyzipper.ZipInfo]:
+        """Members of the archive that are files, in archive order."""
+        return [
+            zip_info
+            for zip_info in self.zip_ref.infolist()
+            if os.path.basename(zip_info.filename)
+        ]
+
+    def member(self, member: str) -> "ZipMember":
+        """Handle on a member, read by the converters without extracting it."""
+        return ZipMember(self, member)
+
+    def read_sample(self, member: str) -> bytes:
+        """
+        Read the leading bytes of a member used by the content validations,
+        the member stream is kept open for its reads to continue.
+        """
+        if member not in self._samples:
+            stream = self.zip_ref.open(member)
+            self._streams[member] = stream
+            self._samples[member] = stream.read(VALIDATION_SAMPLE_SIZE)
+        return self._samples[member]
+
+    def open_member(self, member: str) -> BinaryIO:
+        """
+        Open a member as a stream from its start. A stream that has not read
+        past the sample is superseded by the new one without decompressing
+        anything again, otherwise the member is spilled to a temp file.
+        """
+        if member not in self._extracted:
+            reader = self._readers.get(member)
+            if reader is None or not reader.past_sample:
+                self._readers[member] = MemberReader(
+                    self.read_sample(member),
+                    self._streams[member],
+                    os.path.basename(member),
+                )
+                return io.BufferedReader(self._readers[member])
+        return open(self.extract(member), "rb")
+
+    def extract(self, member: str) -> str:
+        """
+        Spill a member into a temp file and return its name, continuing from
+        the sample unless the member stream was already read past it. A
+        member is extracted only once.
+        """
+        if member not in self._extracted:
+            reader = self._readers.pop(member, None)
+            if reader is not None and reader.past_sample:
+                self.release(member)
+            with tempfile.NamedTemporaryFile(
+                suffix=os.path.splitext(member)[1], delete=False
+            ) as temp_file:
+                try:
+                    with io.BufferedReader(
+                        MemberReader(
+                            self.read_sample(member),
+                            self._streams[member],
+                            os.path.basename(member),
+                        )
+                    ) as member_data:
+                        shutil.copyfileobj(
+                            member_data, temp_file, ZIP_EXTRACT_CHUNK_SIZE
+                        )
+                except Exception:
+                    temp_file.close()
+                    os.remove(temp_file.name)
+                    raise
+                finally:
+                    self.release(member)
+            self._extracted[member] = temp_file.name
+        return self._extracted[member]
+
+    def release(self, member: str) -> None:
+        """Drop the open stream and sample of a member that is not processed."""
+        self._samples.pop(member, None)
+        self._readers.pop(member, None)
+        stream = self._streams.pop(member, None)
+        if stream:
+            stream.close()
+
+    def close(self) -> None:
+        """Close the archive and remove the temp files of extracted members."""
+        for member in list(self._streams):
+            self.release(member)
+        for temp_file_name in self._extracted.values():
+            with suppress(FileNotFoundError):
+                os.remove(temp_file_name)
+        self._extracted.clear()
+        if self._zip_ref is not None:
+            self._zip_ref.close()
+            self._zip_ref = None
+
+
+class ZipMember:
+    """
+    A member of an open zip session passed to the converters in place of the
+    path of an extracted file.
+    """
+
+    def __init__(self, zip_session: ZipSession, name: str):
+        self.zip_session = zip_session
+        self.name = name
+        self.file_size = zip_session.zip_ref.getinfo(name).file_size
+
+    def __str__(self) -> str:
+        return self.name
+
+    def open(self) -> BinaryIO:
+        """Open the member as a stream from its start."""
+        return self.zip_session.open_member(self.name)
+
+    def extract(self) -> str:
+        """Spill the member to a temp file for readers that need random access."""
+        return self.zip_session.extract(self.name)
+
+
+FileSource = Union[str, ZipMember]
+
+
+def open_file_source(file_source: FileSource) -> Union[str, BinaryIO]:
+    """
+    Return what the readers take for a file source, a path as it is and a
+    zip member as a stream from its start.
+    """
+    if isinstance(file_source, ZipMember):
+        return file_source.open()
+    return file_source
+
+
+def get_file_source_path(file_source: FileSource) -> str:
+    """Return the path of a file source, spilling a zip member to disk."""
+    if isinstance(file_source, ZipMember):
+        return file_source.extract()
+    return file_source
+
+
+def corrupt_member_exception(
+    file_name: str, error: Exception
+) -> InvalidFileCompressionException:
+    """
+    Rejection for a zip member that fails to decompress
+    """
+    return InvalidFileCompressionException(
+        message=f"Failed: File {file_name} in the zip is corrupt, error: {str(error)}",
+        reject_file=True,
+        additional_details={
+            "file_name": file_name,
+            "error": "File in the zip is corrupt",
+        },
+    )
+
+
+class MemoryBudget:
+    """
+    Memory shared by the members of a zip processed at once. A member waits
+    until its reservation fits in what is left of the limit, and a member
+    larger than the limit runs only when nothing else holds a reservation.
+    Once the budget is closed no reservation is granted.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.reserved = 0
+        self.closed = False
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def reserve(self, amount: int) -> Iterator[None]:
+        """
+        Hold amount bytes of the budget for the duration of the block. A
+        block that raises closes the budget before its memory is released,
+        and a member waiting for its reservation when the budget is closed
+        is cancelled.
+        """
+        amount = min(amount, self.limit)
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.closed or self.reserved + amount <= self.limit
+            )
+            if self.closed:
+                raise CancelledError()
+            self.reserved += amount
+        try:
+            yield
+        except Exception:
+            self.close()
+            raise
+        finally:
+            with self._condition:
+                self.reserved -= amount
+                self._condition.notify_all()
+
+    def close(self) -> None:
+        """Stop granting reservations, waking the members waiting for one."""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
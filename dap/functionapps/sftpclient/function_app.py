@@ -84,6 +84,8 @@ def timer_trigger_fa(mytimer: func.TimerRequest) -> None:
                     "archive_sftp_container_path": EZ_PRESTAGING_ADLS_ARCHIVE_SFTP_CONTAINER_PATH,
                     "rejected_files_adls_connection_string": EZ_PRESTAGING_ADLS_CONNECTION_STRING,
                     "rejected_files_adls_container_path": EZ_PRESTAGING_ADLS_REJECTED_SFTP_FILES_CONTAINER_PATH,
+                    "source_connection_string": EZ_PRESTAGING_ADLS_CONNECTION_STRING,
+                    "source_container_path": EZ_PRESTAGING_ADLS_SFTP_CONTAINER_PATH,
                 },
             ),
             "MANUAL_FILE_UPLOAD": (
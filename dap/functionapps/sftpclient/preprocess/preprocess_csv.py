@@ -1,19 +1,37 @@
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Tuple
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from pandas._libs.parsers import STR_NA_VALUES
+from azure.storage.blob import ContainerClient
 from common.constants import (
     ACTIVITY_FILE_CONFIG_TBL,
     CONTROL_TBL_SCHEMA,
+    CSV_READER_ENGINE,
     CSV_SCENARIOS_CONFIG_FILE,
+    CSV_STREAMING_BATCH_ROWS,
+    CSV_STREAMING_ENABLED,
     LOG_ACTIVITY_END_FAILED,
+    STRING_DTYPE,
 )
 from common.connection_manager import read_scenarios_configs
+from common.zip_session import FileSource, open_file_source
 from preprocess.utils import (
+    get_metadata_row_count,
     get_metadata_from_single_row,
     get_metadata_from_multiple_rows,
+    precheck_file_metadata,
     validate_file_metadata,
     append_metadata_to_dataframe,
 )
+from writers.utils import (
+    standardize_dataframe_columns,
+    add_audit_columns,
+    get_parquet_writer_options,
+    write_parquet_batches,
+)
 from common.audit_logger import log_activity_end, log_activity_error
+from common.logger_utils import logger
 from common.helper_utils import create_activity_ref_details, raise_error
 from common.exception_handlers import (
     FileValidationException,
@@ -27,7 +45,7 @@ DEFAULT_DATA_START_ROW = 2
 
 
 def preprocess_csv_file(
-    file_path: str,
+    file_path: FileSource,
     file_configs: list,
     file_pattern_name: str,
     org_file_name: str,
@@ -53,15 +71,41 @@ def preprocess_csv_file(
             )
             skip_empty_rows = file_type_config.get("skip_empty_rows", False)
 
-            raw_data = pd.read_csv(
-                file_path, header=None, delimiter=delimiter, dtype=str
+            raw_data = read_metadata_rows(
+                file_path=file_path,
+                delimiter=delimiter,
+                row_count=get_metadata_row_count(
+                    scenario_configs.get(file_type_config.get("metadata"), {})
+                ),
             )
 
             metadata, scenario_config = process_metadata(
                 raw_data, scenario_configs, file_type_config
             )
 
-            df = load_dataframe(file_path, delimiter, header_row, data_start_row)
+            # Reject clear count mismatches before the full parse
+            if file_type_config.get("validate_count", False):
+                condition = file_type_config.get("condition", "summary_count")
+                expected_count = int(metadata.get("expected_count"))
+                # A zip member would have to be spilled to disk to be counted
+                if not skip_empty_rows and isinstance(file_path, str):
+                    precheck_file_metadata(
+                        condition,
+                        expected_count,
+                        file_path,
+                        delimiter,
+                        header_row,
+                        data_start_row,
+                        org_file_name,
+                    )
+
+            df = load_dataframe(
+                file_path,
+                delimiter,
+                header_row,
+                data_start_row,
+                get_reader_engine(file_type_config),
+            )
 
             if skip_empty_rows:
                 df = df.dropna(how="all")
@@ -71,10 +115,10 @@ def preprocess_csv_file(
                 df.columns = [f"column{i+1}" for i in range(df.shape[1])]
 
             # Validate file metadata
-            if file_type_config.get("validate_count", False):
-                condition = file_type_config.get("condition", "summary_count")
-                expected_count = int(metadata.get("expected_count"))
-                validate_file_metadata(condition, expected_count, df, org_file_name)
+            if condition:
+                validate_file_metadata(
+                    condition, expected_count, len(df), org_file_name
+                )
 
             # Append metadata to the DataFrame
             append_metadata_to_dataframe(df, metadata, scenario_config)
@@ -83,7 +127,13 @@ def preprocess_csv_file(
             header_row = DEFAULT_HEADER_ROW
             data_start_row = DEFAULT_DATA_START_ROW
 
-            df = load_dataframe(file_path, delimiter, header_row, data_start_row)
+            df = load_dataframe(
+                file_path,
+                delimiter,
+                header_row,
+                data_start_row,
+                CSV_READER_ENGINE.lower(),
+            )
 
         df.reset_index(drop=True, inplace=True)
 
@@ -103,6 +153,127 @@ def preprocess_csv_file(
     return df, expected_count, condition, logging_completed
 
 
+def preprocess_csv_file_streaming(
+    container_client: ContainerClient,
+    file_path: FileSource,
+    file_configs: list,
+    file_pattern_name: str,
+    org_file_name: str,
+    zip_file_name: str,
+    ingestion_time: str,
+    parquet_blob_name: str,
+    **kwargs: Any,
+) -> Tuple[Dict[str, Any], int, str, bool]:
+    """
+    Process the CSV file in batches of CSV_STREAMING_BATCH_ROWS rows and write
+    each batch as a row group of the parquet file, so memory is bounded by
+    the batch size instead of the file size. The row count is validated after
+    the last batch, before the parquet file is committed.
+    """
+
+    activity_type = kwargs.get("activity_type")
+    activity_run_id = kwargs.get("activity_run_id")
+    logging_completed = kwargs.get("logging_completed")
+    condition = None
+    expected_count = None
+
+    scenario_configs = read_scenarios_configs(CSV_SCENARIOS_CONFIG_FILE)
+    try:
+        file_type_config = get_csv_config(file_configs, file_pattern_name) or {}
+        delimiter = file_type_config.get("delimiter", DEFAULT_DELIMITER)
+        header_row = file_type_config.get("header_row", DEFAULT_HEADER_ROW)
+        data_start_row = file_type_config.get("data_start_row", DEFAULT_DATA_START_ROW)
+        skip_empty_rows = file_type_config.get("skip_empty_rows", False)
+        metadata, scenario_config = {}, {}
+
+        if file_type_config:
+            raw_data = read_metadata_rows(
+                file_path=file_path,
+                delimiter=delimiter,
+                row_count=get_metadata_row_count(
+                    scenario_configs.get(file_type_config.get("metadata"), {})
+                ),
+            )
+            metadata, scenario_config = process_metadata(
+                raw_data, scenario_configs, file_type_config
+            )
+            if file_type_config.get("validate_count", False):
+                condition = file_type_config.get("condition", "summary_count")
+                expected_count = int(metadata.get("expected_count"))
+                # A zip member would have to be spilled to disk to be counted
+                if not skip_empty_rows and isinstance(file_path, str):
+                    precheck_file_metadata(
+                        condition,
+                        expected_count,
+                        file_path,
+                        delimiter,
+                        header_row,
+                        data_start_row,
+                        org_file_name,
+                    )
+
+        def transform_batches() -> Iterator[pd.DataFrame]:
+            row_count = 0
+            for df in load_dataframe_batches(
+                file_path, delimiter, header_row, data_start_row
+            ):
+                if skip_empty_rows:
+                    df = df.dropna(how="all")
+
+                # Create default column names if no header row is provided
+                if header_row is None:
+                    df.columns = [f"column{i+1}" for i in range(df.shape[1])]
+
+                if scenario_config:
+                    append_metadata_to_dataframe(df, metadata, scenario_config)
+
+                df = add_audit_columns(
+                    df, ingestion_time, org_file_name, zip_file_name, parquet_blob_name
+                )
+                row_count += len(df)
+                yield standardize_dataframe_columns(df=df)
+
+            # Validate file metadata
+            if condition:
+                validate_file_metadata(
+                    condition, expected_count, row_count, org_file_name
+                )
+
+        parquet_stats = write_parquet_batches(
+            container_client,
+            transform_batches(),
+            parquet_blob_name,
+            get_parquet_writer_options(file_type_config),
+        )
+
+    except FileValidationException as e:
+        handle_logging_error(
+            activity_run_id,
+            activity_type,
+            zip_file_name,
+            org_file_name,
+            e.details.get("error"),
+            logging_completed,
+            condition,
+            expected_count,
+        )
+        raise e
+
+    return parquet_stats, expected_count, condition, logging_completed
+
+
+def is_csv_streaming_enabled(file_configs: list, file_pattern_name: str) -> bool:
+    """Return whether the CSV file is converted to parquet in batches."""
+    file_type_config = get_csv_config(file_configs, file_pattern_name) or {}
+    streaming = file_type_config.get("streaming", CSV_STREAMING_ENABLED)
+    return str(streaming).lower() == "true"
+
+
+def get_reader_engine(file_type_config: Dict[str, Any]) -> str:
+    """Return the CSV reader engine configured for the file pattern."""
+    return file_type_config.get("reader_engine", CSV_READER_ENGINE).lower()
+
+
 def get_csv_config(
     file_configs: List[Dict[str, Any]], file_pattern_name: str
 ) -> Dict[str, Any]:
@@ -146,21 +317,121 @@ def process_metadata(
     return metadata, scenario_config
 
 
+def read_metadata_rows(
+    file_path: FileSource, delimiter: str, row_count: int
+) -> pd.DataFrame:
+    """Read only the leading rows of the CSV file that hold the metadata."""
+    if not row_count:
+        return pd.DataFrame()
+    return pd.read_csv(
+        open_file_source(file_path),
+        header=None,
+        delimiter=delimiter,
+        dtype=str,
+        nrows=row_count,
+    )
+
+
 def load_dataframe(
-    file_path: str, delimiter: str, header_row: int, data_start_row: int
+    file_path: FileSource,
+    delimiter: str,
+    header_row: int,
+    data_start_row: int,
+    engine: str = "pandas",
 ) -> pd.DataFrame:
     """Load DataFrame from CSV file with specified parameters."""
+    if engine == "pyarrow":
+        try:
+            return load_dataframe_pyarrow(
+                file_path, delimiter, header_row, data_start_row
+            )
+        except pa.ArrowInvalid as e:
+            logger.warning(
+                "Unable to read %s with the pyarrow engine, falling back to pandas: %s",
+                file_path,
+                e,
+            )
+    if header_row is not None:
+        return pd.read_csv(
+            open_file_source(file_path),
+            skiprows=header_row - 1,
+            delimiter=delimiter,
+            dtype=STRING_DTYPE,
+        )
+    else:
+        return pd.read_csv(
+            open_file_source(file_path),
+            header=None,
+            skiprows=data_start_row - 1,
+            delimiter=delimiter,
+            dtype=STRING_DTYPE,
+        )
+
+
+def load_dataframe_pyarrow(
+    file_path: FileSource, delimiter: str, header_row: int, data_start_row: int
+) -> pd.DataFrame:
+    """
+    Load DataFrame from CSV file with the multithreaded Arrow reader.
+    Column names are resolved by pandas from the header row only, so
+    duplicate and blank names and the string typing of every column match
+    load_dataframe with the pandas engine.
+    """
+    skip_rows = header_row - 1 if header_row is not None else data_start_row - 1
+    columns = pd.read_csv(
+        open_file_source(file_path),
+        header=0 if header_row is not None else None,
+        skiprows=skip_rows,
+        delimiter=delimiter,
+        dtype=STRING_DTYPE,
+        nrows=0,
+    ).columns
+    column_names = [str(column) for column in columns]
+    table = pa_csv.read_csv(
+        open_file_source(file_path),
+        read_options=pa_csv.ReadOptions(
+            skip_rows=skip_rows + (1 if header_row is not None else 0),
+            column_names=column_names,
+        ),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={column: pa.large_string() for column in column_names},
+            null_values=list(STR_NA_VALUES),
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=True,
+        ),
+    )
+    df = table.to_pandas(
+        types_mapper={pa.large_string(): pd.StringDtype("pyarrow")}.get
+    )
+    df.columns = columns
+    return df
+
+
+def load_dataframe_batches(
+    file_path: FileSource,
+    delimiter: str,
+    header_row: int,
+    data_start_row: int,
+    batch_rows: int = CSV_STREAMING_BATCH_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """Load the CSV file as DataFrames of at most batch_rows rows."""
     if header_row is not None:
         return pd.read_csv(
-            file_path, skiprows=header_row - 1, delimiter=delimiter, dtype=str
+            open_file_source(file_path),
+            skiprows=header_row - 1,
+            delimiter=delimiter,
+            dtype=STRING_DTYPE,
+            chunksize=batch_rows,
         )
     else:
         return pd.read_csv(
-            file_path,
+            open_file_source(file_path),
             header=None,
             skiprows=data_start_row - 1,
             delimiter=delimiter,
-            dtype=str,
+            dtype=STRING_DTYPE,
+            chunksize=batch_rows,
         )
 
 
@@ -1,19 +1,30 @@
-from typing import Any, Dict, List, Tuple
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import chain, islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 import pandas as pd
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from pandas.io.parsers import TextParser
+from python_calamine import CalamineSheet, CalamineWorkbook
 from azure.storage.blob import ContainerClient
 from common.constants import (
     ACTIVITY_FILE_CONFIG_TBL,
     CONTROL_TBL_SCHEMA,
+    EXCEL_BATCH_ROWS,
+    EXCEL_MAX_SHEET_WORKERS,
+    EXCEL_READER_ENGINE,
     EXCEL_SCENARIOS_CONFIG_FILE,
     LOG_ACTIVITY_END_FAILED,
     LOG_ACTIVITY_END_SUCCESS,
+    STRING_DTYPE,
 )
 from common.connection_manager import get_source_file_prefix, read_scenarios_configs
 from common.logger_utils import logger
 from preprocess.utils import (
     fill_missing_values,
     get_metadata_from_multiple_rows,
+    get_metadata_row_count,
     validate_file_metadata,
     append_metadata_to_dataframe,
 )
@@ -21,6 +32,8 @@ from writers.utils import (
     send_message_to_queue,
     standardize_dataframe_columns,
     add_audit_columns,
+    get_parquet_writer_options,
+    write_parquet_batches,
     write_parquet_file,
 )
 from common.audit_logger import log_activity_end, log_activity_error
@@ -44,7 +57,12 @@ def preprocess_excel_file(
     org_file_name: str,
     **kwargs: Any,
 ):
-    """Process the excel file according to the specified configuration."""
+    """
+    Process the excel file according to the specified configuration. The
+    sheets listed under "sheets" are parsed concurrently from one open of the
+    workbook, each into its own parquet output and queue message, otherwise
+    the first sheet is processed.
+    """
 
     activity_type = kwargs.get("activity_type")
     activity_run_id = kwargs.get("activity_run_id")
@@ -62,91 +80,82 @@ def preprocess_excel_file(
     scenario_configs = read_scenarios_configs(EXCEL_SCENARIOS_CONFIG_FILE)
 
     file_type_config = get_excel_config(file_configs, file_pattern_name)
+    engine = get_excel_reader_engine(file_type_config)
+    sheets = get_excel_sheets(
+        file_type_config, org_file_name, timestamp, source_file_prefix
+    )
 
-    header_row = DEFAULT_HEADER_ROW
-    condition = None
-    expected_count = None
-    try:
-        with pd.ExcelFile(temp_file_name) as excel_data:
-            sheet_name = excel_data.sheet_names[0]
-            raw_data = pd.read_excel(
-                excel_data, sheet_name=sheet_name, header=None, dtype=str
-            )
-            if file_type_config:
-                header_row = file_type_config.get("header_row", DEFAULT_HEADER_ROW)
-                metadata, scenario_config = process_metadata(
-                    raw_data, scenario_configs, file_type_config
-                )
-                df = pd.read_excel(
-                    excel_data, sheet_name=sheet_name, header=header_row - 1, dtype=str
-                )
-                if file_type_config.get("validate_count", False):
-                    condition = file_type_config.get("condition", "summary_count")
-                    expected_count = int(metadata.get("expected_count"))
-                    validate_file_metadata(condition, expected_count, df, org_file_name)
+    failed_sheet = sheets[0]
+    failures = []
 
-                # Add specified metadata to the DataFrame as new columns
-                append_metadata_to_dataframe(df, metadata, scenario_config)
+    def process_sheet(sheet: Dict[str, Any], **kwargs: Any) -> None:
+        """Convert a sheet, recording its failure in the order sheets fail."""
+        try:
+            preprocess_excel_sheet(sheet=sheet, **kwargs)
+        except Exception as e:
+            failures.append((sheet, e))
+            raise
 
-                # Fill missing values based on the configuration
-                fill_missing_values_config = file_type_config.get(
-                    "fill_missing_values", []
-                )
-                df = fill_missing_values(df, fill_missing_values_config)
-            else:
-                if source_name.lower() == "genco":
-                    df = pd.read_excel(
-                        excel_data, sheet_name=sheet_name, header=None, dtype=str
-                    )
-                    df.columns = [f"_c{i}" for i in range(df.shape[1])]
-                else:
-                    df = pd.read_excel(
-                        excel_data,
-                        sheet_name=sheet_name,
-                        header=header_row - 1,
-                        dtype=str,
+    try:
+        # Sheets are loaded from the shared workbook one at a time
+        workbook_lock = threading.Lock()
+        with open_excel_workbook(temp_file_name, engine) as workbook:
+            with ThreadPoolExecutor(max_workers=EXCEL_MAX_SHEET_WORKERS) as executor:
+                futures = [
+                    executor.submit(
+                        process_sheet,
+                        container_client=container_client,
+                        workbook=workbook,
+                        workbook_lock=workbook_lock,
+                        sheet=sheet,
+                        engine=engine,
+                        scenario_configs=scenario_configs,
+                        source_name=source_name,
+                        org_file_name=org_file_name,
+                        zip_file_name=zip_file_name,
+                        ingestion_time=ingestion_time,
                     )
+                    for sheet in sheets
+                ]
+                wait(futures, return_when=FIRST_EXCEPTION)
+                for future in futures:
+                    future.cancel()
+        if failures:
+            failed_sheet, error = failures[0]
+            delete_sheet_outputs(container_client, sheets)
+            raise error
 
-            # Reset index for the DataFrame
-            df.reset_index(drop=True, inplace=True)
-
-            parquet_blob_name = f"{org_file_name.rsplit('.', 1)[0]}_{timestamp}.parquet"
-            if source_name.lower() == "genco":
-                row_count = write_parquet_file(container_client, df, parquet_blob_name)
-            else:
-                df = add_audit_columns(
-                    df, ingestion_time, org_file_name, zip_file_name, parquet_blob_name
-                )
-                standardized_df = standardize_dataframe_columns(df=df)
-                row_count = write_parquet_file(
-                    container_client, standardized_df, parquet_blob_name
-                )
-            log_activity_completion(
-                activity_type=activity_type,
-                activity_run_id=activity_run_id,
-                zip_file_name=zip_file_name,
-                org_file_name=org_file_name,
-                parquet_blob_name=parquet_blob_name,
-                logging_completed=logging_completed,
-                condition=condition,
-                expected_count=expected_count,
-                row_count=row_count,
-            )
+        single_sheet = sheets[0] if len(sheets) == 1 else {}
+        log_activity_completion(
+            activity_type=activity_type,
+            activity_run_id=activity_run_id,
+            zip_file_name=zip_file_name,
+            org_file_name=org_file_name,
+            logging_completed=logging_completed,
+            condition=single_sheet.get("condition"),
+            expected_count=single_sheet.get("expected_count"),
+            parquet_stats=get_workbook_stats(sheets, file_type_config),
+        )
+        for sheet in sheets:
+            condition = sheet["condition"]
             send_message_to_queue(
                 message={
-                    "source_file_name": parquet_blob_name,
-                    "source_file_prefix": source_file_prefix,
+                    "source_file_name": sheet["parquet_stats"]["parquet_file_names"][0],
+                    "source_file_names": sheet["parquet_stats"]["parquet_file_names"],
+                    "source_file_prefix": sheet["source_file_prefix"],
                     "source_name": source_name,
                     "split_file": True if condition == "summary_count" else False,
                     "summary_count": (
-                        expected_count if condition == "summary_count" else None
+                        sheet["expected_count"]
+                        if condition == "summary_count"
+                        else None
                     ),
                 }
             )
 
-            logger.info(
-                "Completed %s activity for excel file: %s", activity_type, org_file_name
-            )
+        logger.info(
+            "Completed %s activity for excel file: %s", activity_type, org_file_name
+        )
 
     except FileValidationException as e:
         handle_logging_error(
@@ -156,8 +165,8 @@ def preprocess_excel_file(
             org_file_name,
             e.details.get("error"),
             logging_completed,
-            condition,
-            expected_count,
+            failed_sheet["condition"],
+            failed_sheet["expected_count"],
         )
         raise e
     except Exception as e:
@@ -167,6 +176,274 @@ def preprocess_excel_file(
         raise_error(error_string)
 
 
+def preprocess_excel_sheet(
+    container_client: ContainerClient,
+    workbook: Union[pd.ExcelFile, CalamineWorkbook],
+    workbook_lock: threading.Lock,
+    sheet: Dict[str, Any],
+    engine: str,
+    scenario_configs: Dict[str, Any],
+    source_name: str,
+    org_file_name: str,
+    zip_file_name: str,
+    ingestion_time: str,
+) -> None:
+    """
+    Convert a sheet of the workbook to parquet. The validation condition,
+    expected count and parquet stats of the sheet are recorded on it.
+    """
+    file_type_config = sheet["config"]
+    parquet_blob_name = sheet["parquet_blob_name"]
+    header_row = DEFAULT_HEADER_ROW
+    if engine == "calamine":
+        # The metadata rows are the head of the single pass over the sheet
+        with workbook_lock:
+            calamine_sheet = (
+                workbook.get_sheet_by_name(sheet["sheet"])
+                if isinstance(sheet["sheet"], str)
+                else workbook.get_sheet_by_index(sheet["sheet"])
+            )
+        rows = read_excel_rows_calamine(calamine_sheet)
+        metadata, scenario_config = {}, {}
+        fill_missing_values_config = []
+        header = 0
+        if file_type_config:
+            header_row = file_type_config.get("header_row", DEFAULT_HEADER_ROW)
+            scenario_key = file_type_config.get("metadata")
+            head_rows = list(
+                islice(
+                    rows,
+                    max(
+                        header_row,
+                        get_metadata_row_count(scenario_configs.get(scenario_key, {})),
+                    ),
+                )
+            )
+            metadata, scenario_config = process_metadata(
+                parse_excel_rows(head_rows, header=None, dtype=str),
+                scenario_configs,
+                file_type_config,
+            )
+            if file_type_config.get("validate_count", False):
+                sheet["condition"] = file_type_config.get("condition", "summary_count")
+                sheet["expected_count"] = int(metadata.get("expected_count"))
+            fill_missing_values_config = file_type_config.get("fill_missing_values", [])
+            rows = chain(head_rows[header_row - 1 :], rows)
+        elif source_name.lower() == "genco":
+            header = None
+
+        def transform_batches() -> Iterator[pd.DataFrame]:
+            row_count = 0
+            # Filling from neighbouring rows needs the sheet in one batch
+            for df in load_excel_batches(
+                rows,
+                header=header,
+                batch_rows=None if fill_missing_values_config else EXCEL_BATCH_ROWS,
+            ):
+                row_count += len(df)
+                if header is None:
+                    df.columns = [f"_c{i}" for i in range(df.shape[1])]
+                    yield df
+                    continue
+                if scenario_config:
+                    append_metadata_to_dataframe(df, metadata, scenario_config)
+                df = fill_missing_values(df, fill_missing_values_config)
+                if source_name.lower() != "genco":
+                    df = add_audit_columns(
+                        df,
+                        ingestion_time,
+                        org_file_name,
+                        zip_file_name,
+                        parquet_blob_name,
+                    )
+                    df = standardize_dataframe_columns(df=df)
+                yield df
+
+            # Validate file metadata
+            if sheet["condition"]:
+                validate_file_metadata(
+                    sheet["condition"],
+                    sheet["expected_count"],
+                    row_count,
+                    org_file_name,
+                )
+
+        sheet["parquet_stats"] = write_parquet_batches(
+            container_client,
+            transform_batches(),
+            parquet_blob_name,
+            get_parquet_writer_options(file_type_config),
+        )
+    else:
+        sheet_name = sheet["sheet"]
+        with workbook_lock:
+            if file_type_config:
+                raw_data = pd.read_excel(
+                    workbook, sheet_name=sheet_name, header=None, dtype=str
+                )
+                header_row = file_type_config.get("header_row", DEFAULT_HEADER_ROW)
+                metadata, scenario_config = process_metadata(
+                    raw_data, scenario_configs, file_type_config
+                )
+                df = pd.read_excel(
+                    workbook,
+                    sheet_name=sheet_name,
+                    header=header_row - 1,
+                    dtype=STRING_DTYPE,
+                )
+            elif source_name.lower() == "genco":
+                df = pd.read_excel(
+                    workbook,
+                    sheet_name=sheet_name,
+                    header=None,
+                    dtype=STRING_DTYPE,
+                )
+                df.columns = [f"_c{i}" for i in range(df.shape[1])]
+            else:
+                df = pd.read_excel(
+                    workbook,
+                    sheet_name=sheet_name,
+                    header=header_row - 1,
+                    dtype=STRING_DTYPE,
+                )
+        if file_type_config:
+            if file_type_config.get("validate_count", False):
+                sheet["condition"] = file_type_config.get("condition", "summary_count")
+                sheet["expected_count"] = int(metadata.get("expected_count"))
+                validate_file_metadata(
+                    sheet["condition"], sheet["expected_count"], len(df), org_file_name
+                )
+
+            # Add specified metadata to the DataFrame as new columns
+            if scenario_config:
+                append_metadata_to_dataframe(df, metadata, scenario_config)
+
+            # Fill missing values based on the configuration
+            fill_missing_values_config = file_type_config.get("fill_missing_values", [])
+            df = fill_missing_values(df, fill_missing_values_config)
+
+        # Reset index for the DataFrame
+        df.reset_index(drop=True, inplace=True)
+
+        if source_name.lower() != "genco":
+            df = add_audit_columns(
+                df, ingestion_time, org_file_name, zip_file_name, parquet_blob_name
+            )
+            df = standardize_dataframe_columns(df=df)
+        sheet["parquet_stats"] = write_parquet_file(
+            container_client,
+            df,
+            parquet_blob_name,
+            get_parquet_writer_options(file_type_config),
+        )
+
+
+def get_excel_sheets(
+    file_type_config: Optional[Dict[str, Any]],
+    org_file_name: str,
+    timestamp: str,
+    source_file_prefix: str,
+) -> List[Dict[str, Any]]:
+    """
+    Return the sheets of the workbook to process. Each entry of "sheets"
+    names a sheet by "sheet_name" or "sheet_index" and overrides the file
+    level configuration, such as its "header_row" and "metadata" scenario.
+    Its "output_name" pattern, formatted with the file and sheet name, names
+    its parquet output, and "file_prefix" the source file prefix of its queue
+    message. Without "sheets" the first sheet is processed as the file.
+    """
+    file_base_name = org_file_name.rsplit(".", 1)[0]
+    if not file_type_config or not file_type_config.get("sheets"):
+        return [
+            {
+                "sheet": 0,
+                "config": file_type_config,
+                "parquet_blob_name": f"{file_base_name}_{timestamp}.parquet",
+                "source_file_prefix": source_file_prefix,
+                "condition": None,
+                "expected_count": None,
+            }
+        ]
+
+    file_level_config = {
+        key: value for key, value in file_type_config.items() if key != "sheets"
+    }
+    sheets = []
+    for sheet_config in file_type_config["sheets"]:
+        sheet = sheet_config.get("sheet_name", sheet_config.get("sheet_index", 0))
+        config = {**file_level_config, **sheet_config}
+        output_name = config.get("output_name", "{file_name}_{sheet_name}").format(
+            file_name=file_base_name, sheet_name=sheet
+        )
+        sheets.append(
+            {
+                "sheet": sheet,
+                "config": config,
+                "parquet_blob_name": f"{output_name}_{timestamp}.parquet",
+                "source_file_prefix": config.get("file_prefix", source_file_prefix),
+                "condition": None,
+                "expected_count": None,
+            }
+        )
+    return sheets
+
+
+@contextmanager
+def open_excel_workbook(file_path: str, engine: str) -> Iterator[Any]:
+    """Open the workbook once for the sheets read from it."""
+    if engine == "calamine":
+        workbook = CalamineWorkbook.from_path(file_path)
+        try:
+            yield workbook
+        finally:
+            workbook.close()
+    else:
+        with pd.ExcelFile(file_path) as workbook:
+            yield workbook
+
+
+def get_workbook_stats(
+    sheets: List[Dict[str, Any]], file_type_config: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Combine the parquet stats of the sheets for the activity log, with the
+    details of each sheet when the workbook declares several.
+    """
+    if len(sheets) == 1 and not (file_type_config or {}).get("sheets"):
+        return sheets[0]["parquet_stats"]
+    stats = [sheet["parquet_stats"] for sheet in sheets]
+    return {
+        "row_count": sum(stat["row_count"] for stat in stats),
+        "parquet_file_size": sum(stat["parquet_file_size"] for stat in stats),
+        "uncompressed_size": sum(stat["uncompressed_size"] for stat in stats),
+        "compression": stats[0]["compression"],
+        "parquet_file_names": [
+            name for stat in stats for name in stat["parquet_file_names"]
+        ],
+        "sheets": [
+            {
+                "sheet_name": sheet["sheet"],
+                "validation_condition": sheet["condition"],
+                "expected_count": sheet["expected_count"],
+                "row_count": sheet["parquet_stats"]["row_count"],
+                "parquet_file_names": sheet["parquet_stats"]["parquet_file_names"],
+            }
+            for sheet in sheets
+        ],
+    }
+
+
+def delete_sheet_outputs(
+    container_client: ContainerClient, sheets: List[Dict[str, Any]]
+) -> None:
+    """Delete the parquet outputs of the sheets written before one failed."""
+    for sheet in sheets:
+        for parquet_file_name in sheet.get("parquet_stats", {}).get(
+            "parquet_file_names", []
+        ):
+            container_client.delete_blob(parquet_file_name)
+
+
 def get_excel_config(
     file_configs: List[Dict[str, Any]], file_pattern_name: str
 ) -> Dict[str, Any]:
@@ -179,6 +456,64 @@ def get_excel_config(
     return None
 
 
+def get_excel_reader_engine(file_type_config: Optional[Dict[str, Any]]) -> str:
+    """Return the Excel reader engine configured for the file pattern."""
+    return (file_type_config or {}).get("reader_engine", EXCEL_READER_ENGINE).lower()
+
+
+def read_excel_rows_calamine(sheet: CalamineSheet) -> Iterator[List[Any]]:
+    """
+    Read the rows of a sheet loaded with calamine. Rows are padded to start
+    from the first column and their cells converted as the pandas excel
+    readers convert them, so the string values written match theirs.
+    """
+    padding = [""] * (sheet.start[1] if sheet.start else 0)
+    for row in sheet.iter_rows():
+        yield padding + [convert_excel_cell(cell) for cell in row]
+
+
+def convert_excel_cell(value: Any) -> Any:
+    """Convert a calamine cell value, integral floats are read as integers."""
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    if isinstance(value, date):
+        return pd.Timestamp(value)
+    if isinstance(value, timedelta):
+        return pd.Timedelta(value)
+    return value
+
+
+def parse_excel_rows(
+    rows: List[List[Any]],
+    header: Optional[int],
+    names: Optional[List[Any]] = None,
+    dtype: Any = STRING_DTYPE,
+) -> pd.DataFrame:
+    """Parse sheet rows into a DataFrame the way pd.read_excel parses them."""
+    if not rows:
+        return pd.DataFrame(columns=names)
+    return TextParser(
+        rows, header=header, names=names, dtype=dtype, skip_blank_lines=False
+    ).read()
+
+
+def load_excel_batches(
+    rows: Iterator[List[Any]],
+    header: Optional[int],
+    batch_rows: Optional[int] = EXCEL_BATCH_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Parse sheet rows into DataFrames of at most batch_rows rows, or a single
+    DataFrame when batch_rows is None. With a header of 0 the columns of
+    every batch are named from the first row.
+    """
+    first_batch_rows = None if batch_rows is None else batch_rows + (header == 0)
+    df = parse_excel_rows(list(islice(rows, first_batch_rows)), header=header)
+    yield df
+    while batch := list(islice(rows, batch_rows)):
+        yield parse_excel_rows(batch, header=None, names=df.columns)
+
+
 def process_metadata(
     raw_data: pd.DataFrame,
     scenario_configs: Dict[str, Any],
@@ -239,28 +574,31 @@ def log_activity_completion(
     activity_run_id: int,
     zip_file_name: str,
     org_file_name: str,
-    parquet_blob_name: str,
     logging_completed: bool,
     condition: str,
     expected_count: int,
-    row_count: int,
+    parquet_stats: Dict[str, Any],
 ) -> None:
-    """Log the completion of an activity."""
+    """
+    Log the completion of an activity, the output is named by its first
+    parquet file as a rolled over output has no blob of its own name.
+    """
     if not logging_completed:
+        parquet_file_name = parquet_stats["parquet_file_names"][0]
         activity_ref_details = create_activity_ref_details(
             activity_type=activity_type,
             zip_file_name=zip_file_name,
             file_name=org_file_name,
-            parquet_file_name=parquet_blob_name,
+            parquet_file_name=parquet_file_name,
             validation_condition=condition,
             summary_count=expected_count if condition == "summary_count" else None,
             header_count=expected_count if condition == "header_count" else None,
-            row_count=row_count,
             is_split_file=True if condition == "summary_count" else False,
+            **parquet_stats,
         )
         log_activity_end(
             activity_run_id=activity_run_id,
             run_status=LOG_ACTIVITY_END_SUCCESS,
             activity_ref_details=activity_ref_details,
-            target_file_name=parquet_blob_name,
+            target_file_name=parquet_file_name,
         )
@@ -1,5 +1,11 @@
+import mmap
+import os
 import re
+from typing import Optional
+import numpy as np
 import pandas as pd
+from common.constants import CSV_COUNT_CHUNK_SIZE
+from writers.utils import repeat_string
 from common.exception_handlers import (
     InvalidHeaderCountException,
     InvalidFileCountConditionException,
@@ -7,6 +13,18 @@ from common.exception_handlers import (
 )
 
 
+def get_metadata_row_count(scenario_config: dict) -> int:
+    """Return the number of leading rows the metadata scenario reads from."""
+    if scenario_config.get("type") == "single_row":
+        return scenario_config["single_row"]["row"]
+    if scenario_config.get("type") == "multiple_rows":
+        return max(
+            (meta["row"] for meta in scenario_config["multiple_rows"]["rows"]),
+            default=0,
+        )
+    return 0
+
+
 def get_metadata_from_single_row(
     raw_data: pd.DataFrame, single_row_config: dict
 ) -> dict:
@@ -62,25 +80,29 @@ def append_metadata_to_dataframe(
     df: pd.DataFrame, metadata: dict, scenario_config: dict
 ):
     """Add metadata to the DataFrame as new columns."""
+
+    def add_column(key: str):
+        value = metadata[key]
+        df[key] = repeat_string(value, len(df)) if isinstance(value, str) else value
+
     if scenario_config["type"] == "single_row":
         include_keys = scenario_config["single_row"].get("include_in_dataframe", [])
         for key in include_keys:
             if key in metadata:
-                df[key] = metadata[key]
+                add_column(key)
 
     elif scenario_config["type"] == "multiple_rows":
         for meta in scenario_config["multiple_rows"].get("rows", []):
             key = meta.get("include_in_dataframe")
             if key and key in metadata:
-                df[key] = metadata[key]
+                add_column(key)
 
 
 def validate_file_metadata(
-    condition: str, expected_count: int, df: pd.DataFrame, org_file_name: str
+    condition: str, expected_count: int, row_count: int, org_file_name: str
 ) -> dict:
     """Handle logic specific to files with summary count/header count."""
 
-    row_count = len(df)
     if condition == "summary_count":
         if expected_count < row_count:
             raise InvalidSummaryCountException(
@@ -113,6 +135,129 @@ def validate_file_metadata(
         )
 
 
+def count_csv_records(
+    file_path: str, delimiter: str = ",", chunk_size: int = CSV_COUNT_CHUNK_SIZE
+) -> Optional[int]:
+    """
+    Count the non-blank records of a CSV file without parsing it.
+    The file is memory-mapped and line breaks are located with numpy one chunk
+    at a time. Breaks inside quoted fields are ignored by tracking the quote
+    parity, and lines holding only whitespace are not counted, as pandas
+    skips them. A quote outside a quoted field only opens one at the start of
+    a field, pandas reads any other as a literal character which the parity
+    cannot follow. Returns None when the file has such a quote, when the
+    quotes are unbalanced or when the delimiter is not a single byte.
+    """
+    delimiter_bytes = delimiter.encode()
+    if len(delimiter_bytes) != 1:
+        return None
+    with open(file_path, "rb") as file:
+        file_size = os.fstat(file.fileno()).st_size
+        if not file_size:
+            return 0
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            record_count = 0
+            quote_count = 0
+            content_count = 0
+            last_break_content = 0
+            for start in range(0, file_size, chunk_size):
+                chunk = np.frombuffer(
+                    data,
+                    dtype=np.uint8,
+                    count=min(chunk_size, file_size - start),
+                    offset=start,
+                )
+                quotes = np.cumsum(chunk == ord('"'), dtype=np.int64) + quote_count
+                content = (
+                    np.cumsum(
+                        (chunk != ord(" "))
+                        & (chunk != ord("\t"))
+                        & (chunk != ord("\r"))
+                        & (chunk != ord("\n")),
+                        dtype=np.int64,
+                    )
+                    + content_count
+                )
+                previous_bytes = np.empty_like(chunk)
+                previous_bytes[1:] = chunk[:-1]
+                previous_bytes[0] = data[start - 1] if start else ord("\n")
+                # A quote opening a run of quotes, with an even count of quotes
+                # ahead of it, is outside a quoted field
+                outside_quotes = (
+                    (chunk == ord('"'))
+                    & (previous_bytes != ord('"'))
+                    & (quotes % 2 == 1)
+                )
+                field_start = (
+                    (previous_bytes == delimiter_bytes[0])
+                    | (previous_bytes == ord("\n"))
+                    | (previous_bytes == ord("\r"))
+                )
+                if np.any(outside_quotes & ~field_start):
+                    # The map cannot close while the chunk still views it
+                    del chunk
+                    return None
+                next_bytes = np.empty_like(chunk)
+                next_bytes[:-1] = chunk[1:]
+                next_bytes[-1] = (
+                    data[start + len(chunk)] if start + len(chunk) < file_size else 0
+                )
+                breaks = (chunk == ord("\n")) | (
+                    (chunk == ord("\r")) & (next_bytes != ord("\n"))
+                )
+                breaks &= quotes % 2 == 0
+                break_content = content[breaks]
+                if len(break_content):
+                    record_count += int(
+                        np.count_nonzero(
+                            np.diff(break_content, prepend=last_break_content)
+                        )
+                    )
+                    last_break_content = int(break_content[-1])
+                quote_count = int(quotes[-1])
+                content_count = int(content[-1])
+                del chunk
+
+            if quote_count % 2:
+                return None
+            if content_count > last_break_content:
+                record_count += 1
+    return record_count
+
+
+def precheck_file_metadata(
+    condition: str,
+    expected_count: int,
+    file_path: str,
+    delimiter: str,
+    header_row: Optional[int],
+    data_start_row: int,
+    org_file_name: str,
+) -> None:
+    """
+    Reject a CSV file whose record count clearly violates the count condition
+    before it is parsed. The DataFrame row count is bounded from the record
+    count and the rows skipped ahead of the data, a file within the bounds is
+    left to validate_file_metadata after the full parse.
+    """
+    record_count = count_csv_records(file_path, delimiter)
+    if record_count is None:
+        return
+    if header_row is not None:
+        max_row_count = max(record_count - 1, 0)
+        min_row_count = max(record_count - header_row, 0)
+    else:
+        max_row_count = record_count
+        min_row_count = max(record_count - (data_start_row - 1), 0)
+
+    if condition in ("summary_count", "header_count") and (
+        expected_count < min_row_count
+    ):
+        validate_file_metadata(condition, expected_count, min_row_count, org_file_name)
+    elif condition == "header_count" and expected_count > max_row_count:
+        validate_file_metadata(condition, expected_count, max_row_count, org_file_name)
+
+
 def fill_missing_values(df: pd.DataFrame, fill_configs: list) -> pd.DataFrame:
     """
     Fill missing values in the DataFrame based on the provided configurations.
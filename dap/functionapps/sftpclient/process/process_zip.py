@@ -1,16 +1,22 @@
-import os
-import tempfile
+from concurrent.futures import FIRST_EXCEPTION, CancelledError, ThreadPoolExecutor, wait
 from typing import Any
-import pyzipper
 from azure.storage.blob import ContainerClient
 from common.connection_manager import get_output_client
 from common.helper_utils import create_activity_ref_details, update_file_name
 from common.exception_handlers import (
     FileValidationException,
+    InvalidFileCompressionException,
     raise_error,
 )
 from writers.writers import write_parquet
-from common.constants import INSTANCE_TYPE, LOG_ACTIVITY_END_FAILED, ActivityTypes
+from common.constants import (
+    INSTANCE_TYPE,
+    LOG_ACTIVITY_END_FAILED,
+    ZIP_MAX_WORKERS,
+    ZIP_MEMORY_BUDGET,
+    ZIP_MEMORY_PER_BYTE,
+    ActivityTypes,
+)
 from common.audit_logger import (
     log_activity_end,
     log_activity_error,
@@ -18,11 +24,12 @@ from common.audit_logger import (
     log_activity_start,
 )
 from common.logger_utils import logger
+from common.zip_session import MemoryBudget, ZipMember, ZipSession
 
 
 def process_zip(
     source_type: str,
-    file: str,
+    zip_session: ZipSession,
     zip_file_name: str,
     destination_container_path: str,
     destination_connection_string: str,
@@ -30,99 +37,153 @@ def process_zip(
     file_configs: list,
     timestamp: str,
     parquet_flag: str,
-    valid_csv_files: list,
+    valid_members: dict,
     source_name: str,
 ) -> None:
     """
-    Process the zip, Unzipping and saving to blob
+    Process the zip, saving each valid member to blob. Members are processed
+    concurrently by up to ZIP_MAX_WORKERS threads, each reserving memory for
+    its conversion from the budget of the archive before it starts. Once a
+    member fails or is corrupt, the members not yet started or still waiting
+    for memory are cancelled, and the first failure is raised when the
+    running members finish.
     """
-    try:
-        activity_type = ActivityTypes.PROCESS_ZIP.value
-        logger.info(
-            "Started %s activity for zip file: %s", activity_type, zip_file_name
-        )
+    activity_type = ActivityTypes.PROCESS_ZIP.value
+    logger.info("Started %s activity for zip file: %s", activity_type, zip_file_name)
 
-        with pyzipper.AESZipFile(file, "r") as zip_ref:
-            for file_name in zip_ref.namelist():
-                directory = os.path.basename(file_name)
-                if not directory:
-                    continue
-                try:
-                    for valid_file in valid_csv_files:
-                        valid_file_name = valid_file.get("file_name")
-                        file_in_zip_pattern_name = valid_file.get("file_pattern_name")
-                        if file_name == valid_file_name:
-                            logging_completed = False
-                            activity_id = retrieve_activity_id(
-                                activity_type=activity_type, instance_type=INSTANCE_TYPE
-                            )
-                            activity_run_id = log_activity_start(
-                                activity_id=activity_id,
-                                instance_type=INSTANCE_TYPE,
-                                source_name=source_name,
-                                source_type=source_type,
-                                source_file_name=file_name,
-                                zip_file_name=zip_file_name,
-                            )
+    memory_budget = MemoryBudget(ZIP_MEMORY_BUDGET)
+    failures = []
 
-                            file_name_new = update_file_name(
-                                file_pattern_name=file_in_zip_pattern_name,
-                                file_name=file_name,
-                                zip_file_name=zip_file_name,
-                                timestamp=timestamp,
-                            )
-                            container_client = get_output_client(
-                                file_configs=file_configs,
-                                file_pattern_name=file_in_zip_pattern_name,
-                                connection_string=destination_connection_string,
-                                output_container_path=destination_container_path,
-                                source_name=source_name,
-                            )
-                            with zip_ref.open(file_name) as file_data:
-                                with tempfile.NamedTemporaryFile(
-                                    suffix=".csv", delete=False
-                                ) as temp_file:
-                                    while chunk := file_data.read(100 * 1024 * 1024):
-                                        temp_file.write(chunk)
-                                    temp_file_name = temp_file.name
-                            upload_file_to_blob(
-                                parquet_flag=parquet_flag,
-                                container_client=container_client,
-                                directory=file_name,
-                                file_name_new=file_name_new,
-                                temp_file_name=temp_file_name,
-                                timestamp=timestamp,
-                                zip_file_name=zip_file_name,
-                                file_configs=file_configs,
-                                file_pattern_name=file_pattern_name,
-                                activity_type=activity_type,
-                                activity_run_id=activity_run_id,
-                                logging_completed=logging_completed,
-                                source_name=source_name,
-                                file_in_zip_pattern_name=file_in_zip_pattern_name,
-                            )
-                            logger.info(
-                                f"Uploaded {file_name.split('.')[0]}  as {file_name_new.split('.')[0]} from {zip_file_name} to Azure Blob Storage"
-                            )
-                            break
+    def process_member(**kwargs: Any) -> None:
+        """Process a member, recording its failure in the order members fail."""
+        try:
+            process_zip_member(**kwargs)
+        except CancelledError:
+            raise
+        except Exception as e:
+            failures.append(e)
+            memory_budget.close()
+            raise
 
-                except FileValidationException as e:
-                    continue
-    except Exception as e:
-        if not logging_completed:
-            error_string = f"Unable to process the zip file: {zip_file_name}. An error occurred: {e}"
-            activity_ref_details = create_activity_ref_details(
-                activity_type=activity_type,
+    with ThreadPoolExecutor(max_workers=ZIP_MAX_WORKERS) as executor:
+        futures = [
+            executor.submit(
+                process_member,
+                source_type=source_type,
+                zip_session=zip_session,
+                file_name=file_name,
+                file_in_zip_pattern_name=file_in_zip_pattern_name,
                 zip_file_name=zip_file_name,
+                destination_container_path=destination_container_path,
+                destination_connection_string=destination_connection_string,
+                file_pattern_name=file_pattern_name,
+                file_configs=file_configs,
+                timestamp=timestamp,
+                parquet_flag=parquet_flag,
+                source_name=source_name,
+                memory_budget=memory_budget,
             )
-            log_activity_error(activity_run_id=activity_run_id, error_log=error_string)
-            log_activity_end(
+            for file_name, file_in_zip_pattern_name in valid_members.items()
+        ]
+        wait(futures, return_when=FIRST_EXCEPTION)
+        for future in futures:
+            future.cancel()
+    if failures:
+        raise failures[0]
+
+
+def process_zip_member(
+    source_type: str,
+    zip_session: ZipSession,
+    file_name: str,
+    file_in_zip_pattern_name: str,
+    zip_file_name: str,
+    destination_container_path: str,
+    destination_connection_string: str,
+    file_pattern_name: str,
+    file_configs: list,
+    timestamp: str,
+    parquet_flag: str,
+    source_name: str,
+    memory_budget: MemoryBudget,
+) -> None:
+    """
+    Process a member of the zip under its own activity, saving it to blob
+    """
+    activity_type = ActivityTypes.PROCESS_ZIP.value
+    member_memory = int(
+        zip_session.zip_ref.getinfo(file_name).file_size * ZIP_MEMORY_PER_BYTE
+    )
+    with memory_budget.reserve(member_memory):
+        try:
+            logging_completed = False
+            activity_id = retrieve_activity_id(
+                activity_type=activity_type, instance_type=INSTANCE_TYPE
+            )
+            activity_run_id = log_activity_start(
+                activity_id=activity_id,
+                instance_type=INSTANCE_TYPE,
+                source_name=source_name,
+                source_type=source_type,
+                source_file_name=file_name,
+                zip_file_name=zip_file_name,
+            )
+
+            file_name_new = update_file_name(
+                file_pattern_name=file_in_zip_pattern_name,
+                file_name=file_name,
+                zip_file_name=zip_file_name,
+                timestamp=timestamp,
+            )
+            container_client = get_output_client(
+                file_configs=file_configs,
+                file_pattern_name=file_in_zip_pattern_name,
+                connection_string=destination_connection_string,
+                output_container_path=destination_container_path,
+                source_name=source_name,
+            )
+            upload_file_to_blob(
+                parquet_flag=parquet_flag,
+                container_client=container_client,
+                directory=file_name,
+                file_name_new=file_name_new,
+                zip_member=zip_session.member(file_name),
+                timestamp=timestamp,
+                zip_file_name=zip_file_name,
+                file_configs=file_configs,
+                file_pattern_name=file_pattern_name,
+                activity_type=activity_type,
                 activity_run_id=activity_run_id,
-                run_status=LOG_ACTIVITY_END_FAILED,
-                activity_ref_details=activity_ref_details,
-                target_file_name=zip_file_name,
+                logging_completed=logging_completed,
+                source_name=source_name,
+                file_in_zip_pattern_name=file_in_zip_pattern_name,
             )
-            raise_error(error_string=error_string)
+            logger.info(
+                f"Uploaded {file_name.split('.')[0]}  as {file_name_new.split('.')[0]} from {zip_file_name} to Azure Blob Storage"
+            )
+
+        except InvalidFileCompressionException:
+            # A corrupt member rejects the zip, cancelling the other members
+            raise
+        except FileValidationException:
+            return
+        except Exception as e:
+            if not logging_completed:
+                error_string = f"Unable to process the zip file: {zip_file_name}. An error occurred: {e}"
+                activity_ref_details = create_activity_ref_details(
+                    activity_type=activity_type,
+                    zip_file_name=zip_file_name,
+                )
+                log_activity_error(
+                    activity_run_id=activity_run_id, error_log=error_string
+                )
+                log_activity_end(
+                    activity_run_id=activity_run_id,
+                    run_status=LOG_ACTIVITY_END_FAILED,
+                    activity_ref_details=activity_ref_details,
+                    target_file_name=zip_file_name,
+                )
+                raise_error(error_string=error_string)
 
 
 def upload_file_to_blob(
@@ -130,7 +191,7 @@ def upload_file_to_blob(
     container_client: ContainerClient,
     directory: str,
     file_name_new: str,
-    temp_file_name: str,
+    zip_member: ZipMember,
     timestamp: str,
     zip_file_name: str,
     file_configs: list,
@@ -140,20 +201,24 @@ def upload_file_to_blob(
     logging_completed: bool,
     **kwargs: Any,
 ):
-    """Uploads the file to Azure Blob Storage."""
+    """
+    Uploads the file to Azure Blob Storage, streaming the member out of the
+    zip without extracting it.
+    """
     source_name = kwargs.get("source_name")
     file_in_zip_pattern_name = kwargs.get("file_in_zip_pattern_name")
 
     if parquet_flag.lower() == "false":
-        with open(temp_file_name, "rb") as data:
+        with zip_member.open() as data:
             blob_client_output = container_client.get_blob_client(file_name_new)
-            blob_client_output.upload_blob(data, overwrite=True)
-        os.remove(temp_file_name)
+            blob_client_output.upload_blob(
+                data, length=zip_member.file_size, overwrite=True
+            )
     elif parquet_flag.lower() == "true":
         write_parquet(
             container_client=container_client,
             file_name=file_name_new,
-            temp_file_name=temp_file_name,
+            temp_file_name=zip_member,
             timestamp=timestamp,
             zip_file_name=zip_file_name,
             org_file_name=directory,
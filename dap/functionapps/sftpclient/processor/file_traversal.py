@@ -1,10 +1,15 @@
 import os
-from azure.storage.blob import ContainerClient
+from typing import Iterable, Optional
+from azure.storage.blob import BlobProperties, ContainerClient
 from common.helper_utils import (
     create_temp_file,
     transfer_blob,
+    resume_blob_transfer,
+    complete_blob_transfers,
+    rename_path,
     update_tracker_file_data,
     cleanup_empty_directories,
+    cleanup_empty_directories_hns,
     move_blob,
     get_file_configs,
 )
@@ -12,6 +17,7 @@ from common.connection_manager import (
     read_file_configs,
     read_zip_file_configs,
     get_container_client,
+    get_file_system_client,
 )
 from common.exception_handlers import (
     FileValidationException,
@@ -19,8 +25,18 @@ from common.exception_handlers import (
 )
 from common.decryption_handlers import decryption_handlers_map
 from common.logger_utils import logger
-from common.constants import MALWARE_SCANNING_TAG, NO_THREATS_FOUND, MALICIOUS
+from common.constants import (
+    ADLS_HNS_ENABLED,
+    VALIDATION_SAMPLE_SIZE,
+    MALWARE_SCANNING_TAG,
+    NO_THREATS_FOUND,
+    MALICIOUS,
+)
 from processor.file_type_handlers import file_type_handlers_map
+from validations.validations_pre_download import (
+    execute_validations_pre_download,
+    execute_validations_csv_probe,
+)
 
 
 def process_file(
@@ -34,7 +50,15 @@ def process_file(
     all_file_configs: dict,
     source_blob_name: str,
     source_blob_size: str,
+    retained_source_files: Optional[list] = None,
 ):
+    """
+    Validate the listing metadata of a single source blob, then download and
+    process it. When retained_source_files is given the downloaded blob is
+    kept and its temp file name appended, for the caller to reuse and remove.
+    """
+    temp_file_name = None
+    source_temp_file_name = None
     try:
         source_blob_client = source_container_client.get_blob_client(source_blob_name)
         source_blob_parts = source_blob_name.split("/")
@@ -46,19 +70,63 @@ def process_file(
         source_file_name = source_file_name_pgp.replace(".pgp", "")
         source_file_decrypt_type = source_file_name_pgp.split(".")[-1]
         source_file_type = source_file_name.split(".")[-1]
+        file_configs = get_file_configs(
+            all_file_configs=all_file_configs, source_file_type=source_file_type
+        )
+
+        execute_validations_pre_download(
+            source_type=source_type,
+            source_name=source_name,
+            source_file_name=source_file_name,
+            source_blob_size=source_blob_size,
+            file_configs=file_configs,
+            supported_file_types=file_type_handlers_map.keys(),
+        )
 
         decryption_handler = decryption_handlers_map.get(source_file_decrypt_type)
+        downloaded_data = None
+        blob_properties = None
+        if not decryption_handler and source_file_type == "csv":
+            sample_stream = source_blob_client.download_blob(
+                offset=0, length=VALIDATION_SAMPLE_SIZE
+            )
+            file_sample = sample_stream.readall()
+            execute_validations_csv_probe(
+                source_type=source_type,
+                source_name=source_name,
+                source_file_name=source_file_name,
+                file_sample=file_sample,
+                file_configs=file_configs,
+            )
+            downloaded_data = file_sample
+            blob_properties = sample_stream.properties
+
+        if retained_source_files is not None:
+            source_temp_file_name = create_temp_file(
+                source_blob_client=source_blob_client,
+                downloaded_data=downloaded_data,
+                blob_properties=blob_properties,
+            )
+            retained_source_files.append(source_temp_file_name)
+
         if decryption_handler:
             temp_file_name, source_blob_size = decryption_handler(
-                source_blob_client, source_file_name, source_name, source_type
+                source_blob_client,
+                source_file_name,
+                source_name,
+                source_type,
+                source_temp_file_name=source_temp_file_name,
             )
+        elif source_temp_file_name:
+            temp_file_name = source_temp_file_name
         else:
-            temp_file_name = create_temp_file(source_blob_client=source_blob_client)
+            temp_file_name = create_temp_file(
+                source_blob_client=source_blob_client,
+                downloaded_data=downloaded_data,
+                blob_properties=blob_properties,
+            )
 
         file_type_handler = file_type_handlers_map.get(source_file_type)
-        file_configs = get_file_configs(
-            all_file_configs=all_file_configs, source_file_type=source_file_type
-        )
         if file_type_handler:
             file_type_handler(
                 source_type,
@@ -82,9 +150,13 @@ def process_file(
         logger.error("Error processing file %s: %s", source_blob_name, e)
         raise e
     finally:
-        if os.path.exists(temp_file_name):
+        if (
+            temp_file_name
+            and temp_file_name != source_temp_file_name
+            and os.path.exists(temp_file_name)
+        ):
             os.remove(temp_file_name)
-        logger.info(f"Temporary file {temp_file_name} removed.")
+            logger.info(f"Temporary file {temp_file_name} removed.")
 
 
 def process_sftp_files(
@@ -99,9 +171,16 @@ def process_sftp_files(
     archive_sftp_container_path: str,
     rejected_files_adls_connection_string: str,
     rejected_files_adls_container_path: str,
+    source_connection_string: str,
+    source_container_path: str,
 ) -> None:
     """
     Process SFTP Files
+    With ADLS_HNS_ENABLED the files are archived or rejected with atomic path
+    renames and empty directories are removed with directory operations,
+    otherwise server side copies and blob deletes are used. Files already in
+    the tracker that are still in the source were processed by a run that
+    stopped before archiving them, only their archiving is completed.
     """
     try:
         file_types_configs = read_file_configs()
@@ -118,50 +197,144 @@ def process_sftp_files(
             connection_string=rejected_files_adls_connection_string,
             container_path=rejected_files_adls_container_path,
         )
-        for blob in source_container_client.list_blobs():
-            source_blob_name = blob.name
-            source_blob_size = blob.size
-            if (
-                "." in source_blob_name.split("/")[-1]
-                and source_blob_name not in processed_files
-            ):
-                try:
-                    process_file(
-                        source_type=source_type,
-                        source_container_client=source_container_client,
-                        destination_connection_string=destination_connection_string,
-                        destination_container_path=destination_container_path,
-                        tracker_blob_client=tracker_blob_client,
-                        processed_files=processed_files,
-                        parquet_flag=parquet_flag,
-                        all_file_configs=all_file_configs,
-                        source_blob_name=source_blob_name,
-                        source_blob_size=source_blob_size,
-                    )
-                    transfer_blob(
-                        source_container_client=source_container_client,
-                        target_container_client=archive_sftp_container_client,
-                        source_blob_name=source_blob_name,
-                        operation_type="archive",
-                    )
-                    cleanup_empty_directories(source_container_client, source_blob_name)
+        target_container_clients = {
+            "archive": archive_sftp_container_client,
+            "reject": rejected_files_adls_container_client,
+        }
+        hns_enabled = ADLS_HNS_ENABLED.lower() == "true"
+        if hns_enabled:
+            source_file_system_client = get_file_system_client(
+                connection_string=source_connection_string,
+                container_path=source_container_path,
+            )
+            target_file_system_clients = {
+                "archive": get_file_system_client(
+                    connection_string=archive_connection_string,
+                    container_path=archive_sftp_container_path,
+                ),
+                "reject": get_file_system_client(
+                    connection_string=rejected_files_adls_connection_string,
+                    container_path=rejected_files_adls_container_path,
+                ),
+            }
+        transferred_blobs = []
+        pending_transfers = []
+        created_directories = set()
+        cleanup_blob_names = []
 
-                except FileValidationException as e:
-                    logger.error(
-                        "File validation error: %s, additional details: %s",
-                        e.details,
-                        e.additional_details,
-                    )
-                    if e.reject_file:
-                        transfer_blob(
+        def relocate_source_blob(
+            source_blob_name: str, source_blob_size: int, operation_type: str
+        ) -> None:
+            """Archive or reject a source blob with the configured storage mode."""
+            if hns_enabled:
+                rename_path(
+                    source_file_system_client=source_file_system_client,
+                    target_file_system_client=target_file_system_clients[
+                        operation_type
+                    ],
+                    source_path=source_blob_name,
+                    operation_type=operation_type,
+                    created_directories=created_directories,
+                )
+            else:
+                transfer_blob(
+                    source_container_client=source_container_client,
+                    target_container_client=target_container_clients[operation_type],
+                    source_blob_name=source_blob_name,
+                    operation_type=operation_type,
+                    source_blob_size=source_blob_size,
+                    transferred_blobs=transferred_blobs,
+                    pending_transfers=pending_transfers,
+                )
+
+        def resume_source_blob(source_blob_name: str, source_blob_size: int) -> None:
+            """Archive a source blob already in the tracker, copying it only once."""
+            if hns_enabled:
+                relocate_source_blob(
+                    source_blob_name=source_blob_name,
+                    source_blob_size=source_blob_size,
+                    operation_type="archive",
+                )
+            else:
+                resume_blob_transfer(
+                    source_container_client=source_container_client,
+                    target_container_client=archive_sftp_container_client,
+                    source_blob_name=source_blob_name,
+                    operation_type="archive",
+                    source_blob_size=source_blob_size,
+                    transferred_blobs=transferred_blobs,
+                    pending_transfers=pending_transfers,
+                )
+
+        try:
+            for blob in source_container_client.list_blobs():
+                source_blob_name = blob.name
+                source_blob_size = blob.size
+                if (
+                    "." in source_blob_name.split("/")[-1]
+                    and source_blob_name not in processed_files
+                ):
+                    try:
+                        process_file(
+                            source_type=source_type,
                             source_container_client=source_container_client,
-                            target_container_client=rejected_files_adls_container_client,
+                            destination_connection_string=destination_connection_string,
+                            destination_container_path=destination_container_path,
+                            tracker_blob_client=tracker_blob_client,
+                            processed_files=processed_files,
+                            parquet_flag=parquet_flag,
+                            all_file_configs=all_file_configs,
                             source_blob_name=source_blob_name,
-                            operation_type="reject",
+                            source_blob_size=source_blob_size,
                         )
-                    cleanup_empty_directories(source_container_client, source_blob_name)
-                except Exception as e:
-                    logger.error("Error processing sftp file %s: %s", source_blob_name, e)
+                        relocate_source_blob(
+                            source_blob_name=source_blob_name,
+                            source_blob_size=source_blob_size,
+                            operation_type="archive",
+                        )
+                        cleanup_blob_names.append(source_blob_name)
+
+                    except FileValidationException as e:
+                        logger.error(
+                            "File validation error: %s, additional details: %s",
+                            e.details,
+                            e.additional_details,
+                        )
+                        if e.reject_file:
+                            relocate_source_blob(
+                                source_blob_name=source_blob_name,
+                                source_blob_size=source_blob_size,
+                                operation_type="reject",
+                            )
+                        cleanup_blob_names.append(source_blob_name)
+                    except Exception as e:
+                        logger.error(
+                            "Error processing sftp file %s: %s", source_blob_name, e
+                        )
+                elif "." in source_blob_name.split("/")[-1]:
+                    # Processed by a run that stopped before archiving it
+                    try:
+                        resume_source_blob(
+                            source_blob_name=source_blob_name,
+                            source_blob_size=source_blob_size,
+                        )
+                        cleanup_blob_names.append(source_blob_name)
+                    except Exception as e:
+                        logger.error(
+                            "Error archiving sftp file %s: %s", source_blob_name, e
+                        )
+        finally:
+            if hns_enabled:
+                cleanup_empty_directories_hns(
+                    source_file_system_client, cleanup_blob_names
+                )
+            else:
+                complete_blob_transfers(
+                    source_container_client=source_container_client,
+                    transferred_blobs=transferred_blobs,
+                    pending_transfers=pending_transfers,
+                )
+                cleanup_empty_directories(source_container_client, cleanup_blob_names)
 
     except Exception as e:
         raise_error(error_string=f"An error occurred on SFTP file processing: {e}")
@@ -204,89 +377,113 @@ def process_manual_upload_files(
             connection_string=rejected_files_adls_connection_string,
             container_path=rejected_files_adls_container_path,
         )
-        for blob in manual_upload_container_client.list_blobs():
+        scan_partitions = partition_blobs_by_scan_result(
+            blobs=manual_upload_container_client.list_blobs(include=["tags"]),
+            processed_files=processed_files,
+        )
+        for blob in scan_partitions["unscanned"]:
+            logger.info(
+                f"Blob {blob.name} does not have a scan result tag. Skipping."
+            )
+        for blob in scan_partitions["unknown"]:
+            logger.warning(
+                f"Blob {blob.name} has an unknown scan result: {blob.tags[MALWARE_SCANNING_TAG]}."
+            )
+        for blob in scan_partitions["clean"] + scan_partitions["malicious"]:
             source_blob_name = blob.name
             source_blob_size = blob.size
             source_blob_client = manual_upload_container_client.get_blob_client(
                 source_blob_name
             )
-            rejected_files_adls_blob_client = (
-                rejected_files_adls_container_client.get_blob_client(
-                    f"{source_blob_name}.pgp"
-                )
-            )
-            if (
-                "." in source_blob_name.split("/")[-1]
-                and source_blob_name not in processed_files
-            ):
-                try:
-
-                    if (
-                        MALWARE_SCANNING_TAG
-                        in manual_upload_container_client.get_blob_client(
-                            source_blob_name
-                        ).get_blob_tags()
-                    ):
-                        scan_result = manual_upload_container_client.get_blob_client(
-                            source_blob_name
-                        ).get_blob_tags()[MALWARE_SCANNING_TAG]
-                        if scan_result == NO_THREATS_FOUND:
-                            process_file(
-                                source_type=source_type,
-                                source_container_client=manual_upload_container_client,
-                                destination_connection_string=destination_connection_string,
-                                destination_container_path=destination_container_path,
-                                tracker_blob_client=tracker_blob_client,
-                                processed_files=processed_files,
-                                parquet_flag=parquet_flag,
-                                all_file_configs=all_file_configs,
-                                source_blob_name=source_blob_name,
-                                source_blob_size=source_blob_size,
-                            )
-                            destination_blob_client = (
-                                archive_manual_upload_container_client.get_blob_client(
-                                    f"{source_blob_name}.pgp"
-                                )
-                            )
-                        elif scan_result == MALICIOUS:
-                            destination_blob_client = (
-                                archive_quarantine_container_client.get_blob_client(
-                                    f"{source_blob_name}.pgp"
-                                )
-                            )
-                            logger.info(
-                                f"Blob {source_blob_name} moved to QUARANTINE CONTAINER container."
-                            )
-                        else:
-                            logger.warning(
-                                f"Blob {source_blob_name} has an unknown scan result: {scan_result}."
-                            )
-
-                        move_blob(
-                            source_blob_client,
-                            destination_blob_client,
-                            source_blob_name,
+            retained_source_files = []
+            try:
+                if blob.tags[MALWARE_SCANNING_TAG] == NO_THREATS_FOUND:
+                    process_file(
+                        source_type=source_type,
+                        source_container_client=manual_upload_container_client,
+                        destination_connection_string=destination_connection_string,
+                        destination_container_path=destination_container_path,
+                        tracker_blob_client=tracker_blob_client,
+                        processed_files=processed_files,
+                        parquet_flag=parquet_flag,
+                        all_file_configs=all_file_configs,
+                        source_blob_name=source_blob_name,
+                        source_blob_size=source_blob_size,
+                        retained_source_files=retained_source_files,
+                    )
+                    destination_blob_client = (
+                        archive_manual_upload_container_client.get_blob_client(
+                            f"{source_blob_name}.pgp"
                         )
-                    else:
-                        logger.info(
-                            f"Blob {source_blob_name} does not have a scan result tag. Skipping."
+                    )
+                else:
+                    destination_blob_client = (
+                        archive_quarantine_container_client.get_blob_client(
+                            f"{source_blob_name}.pgp"
                         )
-                except FileValidationException as e:
-                    logger.error(
-                        "File validation error: %s, additional details: %s",
-                        e.details,
-                        e.additional_details,
                     )
-                    if e.reject_file:
-                        move_blob(
-                            source_blob_client,
-                            rejected_files_adls_blob_client,
-                            source_blob_name,
+                    logger.info(
+                        f"Blob {source_blob_name} moved to QUARANTINE CONTAINER container."
+                    )
+
+                move_blob(
+                    source_blob_client,
+                    destination_blob_client,
+                    source_blob_name,
+                    temp_file_name=next(iter(retained_source_files), None),
+                )
+            except FileValidationException as e:
+                logger.error(
+                    "File validation error: %s, additional details: %s",
+                    e.details,
+                    e.additional_details,
+                )
+                if e.reject_file:
+                    rejected_files_adls_blob_client = (
+                        rejected_files_adls_container_client.get_blob_client(
+                            f"{source_blob_name}.pgp"
                         )
-                except Exception as e:
-                    logger.error(
-                        "Error processing manual upload file %s: %s", source_blob_name, e
                     )
+                    move_blob(
+                        source_blob_client,
+                        rejected_files_adls_blob_client,
+                        source_blob_name,
+                        temp_file_name=next(iter(retained_source_files), None),
+                    )
+            except Exception as e:
+                logger.error(
+                    "Error processing manual upload file %s: %s", source_blob_name, e
+                )
+            finally:
+                for source_temp_file_name in retained_source_files:
+                    if os.path.exists(source_temp_file_name):
+                        os.remove(source_temp_file_name)
+                        logger.info(f"Temporary file {source_temp_file_name} removed.")
 
     except Exception as e:
         raise_error(error_string=f"An error occurred: {e}")
+
+
+def partition_blobs_by_scan_result(
+    blobs: Iterable[BlobProperties], processed_files: list
+) -> dict[str, list[BlobProperties]]:
+    """
+    Partition listed blobs, listed with their tags, by the malware scanning
+    result into clean, malicious, unknown and unscanned. Directories and
+    already processed files are left out.
+    """
+    already_processed = set(processed_files)
+    scan_partitions = {"clean": [], "malicious": [], "unknown": [], "unscanned": []}
+    for blob in blobs:
+        if "." not in blob.name.split("/")[-1] or blob.name in already_processed:
+            continue
+        scan_result = (blob.tags or {}).get(MALWARE_SCANNING_TAG)
+        if scan_result is None:
+            scan_partitions["unscanned"].append(blob)
+        elif scan_result == NO_THREATS_FOUND:
+            scan_partitions["clean"].append(blob)
+        elif scan_result == MALICIOUS:
+            scan_partitions["malicious"].append(blob)
+        else:
+            scan_partitions["unknown"].append(blob)
+    return scan_partitions
@@ -9,6 +9,7 @@ from common.exception_handlers import (
     raise_error,
 )
 from common.logger_utils import logger
+from common.zip_session import ZipSession
 
 
 def handle_csv_file(
@@ -69,29 +70,30 @@ def handle_zip_file(
     source_name: str,
 ):
     """Process ZIP files."""
-    file_pattern_name, valid_csv_files, validation_status = execute_validations_zip(
-        source_type=source_type,
-        source_name=source_name,
-        source_file_name=source_file_name,
-        temp_file_name=temp_file_name,
-        source_blob_size=source_blob_size,
-        file_configs=file_configs,
-    )
-    if validation_status:
-        process_zip(
+    with ZipSession(temp_file_name) as zip_session:
+        file_pattern_name, valid_members, validation_status = execute_validations_zip(
             source_type=source_type,
-            file=temp_file_name,
-            zip_file_name=source_file_name,
-            destination_container_path=destination_container_path,
-            destination_connection_string=destination_connection_string,
-            file_pattern_name=file_pattern_name,
-            file_configs=file_configs,
-            timestamp=source_timestamp,
-            parquet_flag=parquet_flag,
-            valid_csv_files=valid_csv_files,
             source_name=source_name,
+            source_file_name=source_file_name,
+            zip_session=zip_session,
+            source_blob_size=source_blob_size,
+            file_configs=file_configs,
         )
-        processed_files.append(source_blob_name)
+        if validation_status:
+            process_zip(
+                source_type=source_type,
+                zip_session=zip_session,
+                zip_file_name=source_file_name,
+                destination_container_path=destination_container_path,
+                destination_connection_string=destination_connection_string,
+                file_pattern_name=file_pattern_name,
+                file_configs=file_configs,
+                timestamp=source_timestamp,
+                parquet_flag=parquet_flag,
+                valid_members=valid_members,
+                source_name=source_name,
+            )
+            processed_files.append(source_blob_name)
 
 
 def handle_excel_file(
@@ -0,0 +1,70 @@
+import os
+import sys
+
+# The modules read their settings from the function app environment on import
+for name in (
+    "EZ_PRESTAGING_ADLS_CONNECTION_STRING",
+    "EZ_PRESTAGING_BLOB_CONNECTION_STRING",
+    "IZ_STAGING_ADLS_CONNECTION_STRING",
+    "EZ_PRESTAGING_ADLS_SFTP_CONTAINER_PATH",
+    "IZ_STAGING_ADLS_SFTP_CONTAINER_PATH",
+    "EZ_PRESTAGING_BLOB_MANUAL_UPLOAD_CONTAINER_PATH",
+    "IZ_STAGING_ADLS_MANUAL_UPLOAD_CONTAINER_PATH",
+    "EZ_PRESTAGING_ADLS_ARCHIVE_SFTP_CONTAINER_PATH",
+    "EZ_PRESTAGING_ADLS_REJECTED_SFTP_FILES_CONTAINER_PATH",
+    "EZ_PRESTAGING_ADLS_REJECTED_MANUAL_UPLOAD_FILES_CONTAINER_PATH",
+    "EZ_PRESTAGING_ADLS_ARCHIVE_MANUAL_UPLOAD_CONTAINER_PATH",
+    "EZ_PRESTAGING_BLOB_ARCHIVE_QUARANTINE_CONTAINER_PATH",
+    "AzureWebJobsStorage",
+    "TRACKER_CONTAINER_PATH",
+    "TRACKER_FILE_NAME",
+    "LOG_CONTAINER_PATH",
+    "METADATA_SQL_DB_CONNECTION_STRING",
+    "KV_URL",
+    "PRIVATE_KEY_EMA_PGP",
+    "PUBLIC_KEY_EMA_PGP",
+    "KV_PRIVATE_KEY_EMA_PGP_SECRET_NAME",
+    "KV_PUBLIC_KEY_EMA_PGP_SECRET_NAME",
+    "EZ_PRESTAGING_ADLS_CONNECTION_SECRET_NAME",
+    "EZ_PRESTAGING_BLOB_CONNECTION_SECRET_NAME",
+    "IZ_STAGING_ADLS_CONNECTION_SECRET_NAME",
+    "METADATA_SQL_DB_CONNECTION_SECRET_NAME",
+    "STAGING_ADLS_QUEUE_NAME",
+    "CRON",
+):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("KV_ENABLE", "false")
+os.environ.setdefault("PARQUET_FLAG", "true")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeBlobClient:
+    """Block blob client keeping the committed blob in the container store."""
+
+    def __init__(self, store: dict, name: str):
+        self.store = store
+        self.name = name
+        self.blocks = {}
+
+    def stage_block(self, block_id, data):
+        self.blocks[block_id] = bytes(data)
+
+    def commit_block_list(self, block_list, **kwargs):
+        self.store[self.name] = b"".join(self.blocks[block.id] for block in block_list)
+
+    def upload_blob(self, data, overwrite=True, **kwargs):
+        self.store[self.name] = data if isinstance(data, bytes) else data.read()
+
+
+class FakeContainerClient:
+    """Container client holding its blobs in memory."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get_blob_client(self, name: str) -> FakeBlobClient:
+        return FakeBlobClient(self.store, name)
+
+    def delete_blob(self, name: str):
+        del self.store[name]
@@ -0,0 +1,134 @@
+import os
+from types import SimpleNamespace
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError
+from common.helper_utils import (
+    complete_blob_transfers,
+    create_temp_file,
+    resume_blob_transfer,
+    transfer_blob,
+)
+
+
+class CopyBlobClient:
+    def __init__(self, container, name):
+        self.container = container
+        self.name = name
+        self.url = f"https://account/{container.name}/{name}"
+        self.credential = None
+
+    def upload_blob_from_url(self, source_url, overwrite=True):
+        self.container.blobs[self.name] = None
+
+    def start_copy_from_url(self, source_url):
+        self.container.blobs[self.name] = "pending"
+
+    def get_blob_properties(self):
+        self.container.property_requests += 1
+        if self.name not in self.container.blobs:
+            raise ResourceNotFoundError("not found")
+        return SimpleNamespace(
+            size=1, copy=SimpleNamespace(status=self.container.blobs[self.name])
+        )
+
+
+class CopyContainerClient:
+    def __init__(self, name, blobs=()):
+        self.name = name
+        self.blobs = dict.fromkeys(blobs)
+        self.property_requests = 0
+        self.delete_requests = []
+
+    def get_blob_client(self, name):
+        return CopyBlobClient(self, name)
+
+    def delete_blobs(self, *names, raise_on_any_failure=True):
+        self.delete_requests.append(names)
+        for name in names:
+            self.blobs.pop(name)
+        return [SimpleNamespace(status_code=202) for _ in names]
+
+
+def test_sources_are_deleted_in_batches(monkeypatch):
+    monkeypatch.setattr("common.helper_utils.SYNC_COPY_MAX_SIZE", 10)
+    monkeypatch.setattr("common.helper_utils.SOURCE_DELETE_FLUSH_SIZE", 3)
+    names = ["large.csv", "a.csv", "b.csv", "c.csv", "d.csv"]
+    source = CopyContainerClient("source", names)
+    archive = CopyContainerClient("archive")
+    transferred_blobs, pending_transfers = [], []
+
+    for name in names:
+        transfer_blob(
+            source,
+            archive,
+            name,
+            "archive",
+            100 if name == "large.csv" else 1,
+            transferred_blobs,
+            pending_transfers,
+        )
+        if name == "b.csv":
+            archive.blobs["large.csv"] = "success"
+
+    # The pending copy is checked once, when the first batch is flushed
+    assert archive.property_requests == 1
+    assert source.delete_requests == [("a.csv", "b.csv", "c.csv", "large.csv")]
+    assert transferred_blobs == ["d.csv"]
+
+    complete_blob_transfers(source, transferred_blobs, pending_transfers)
+    assert source.delete_requests[-1] == ("d.csv",)
+    assert source.blobs == {}
+
+
+def test_resumed_transfer_only_copies_missing_targets(monkeypatch):
+    source = CopyContainerClient("source", ["copied.csv", "missing.csv"])
+    archive = CopyContainerClient("archive", ["copied.csv"])
+    transferred_blobs, pending_transfers = [], []
+    copied = []
+    monkeypatch.setattr(
+        CopyBlobClient,
+        "upload_blob_from_url",
+        lambda self, url, overwrite=True: copied.append(self.name),
+    )
+
+    for name in ("copied.csv", "missing.csv"):
+        resume_blob_transfer(
+            source, archive, name, "archive", 1, transferred_blobs, pending_transfers
+        )
+
+    assert copied == ["missing.csv"]
+    assert transferred_blobs == ["copied.csv", "missing.csv"]
+
+
+class RangeBlobClient:
+    def __init__(self, data, etag):
+        self.data = data
+        self.etag = etag
+        self.blob_name = "blob.csv"
+        self.range_requests = []
+
+    def download_blob(self, offset, length, etag, match_condition):
+        assert (etag, match_condition) == (self.etag, MatchConditions.IfNotModified)
+        self.range_requests.append(offset)
+        return SimpleNamespace(readall=lambda: self.data[offset : offset + length])
+
+
+def test_temp_file_continues_the_sample_on_its_etag(monkeypatch):
+    monkeypatch.setattr("common.helper_utils.DOWNLOAD_BLOCK_SIZE", 4)
+    data = b"0123456789"
+    source_blob_client = RangeBlobClient(data, "sample-etag")
+    sample_properties = SimpleNamespace(
+        etag="sample-etag", size=3, content_range="bytes 0-2/10"
+    )
+
+    temp_file_name = create_temp_file(
+        source_blob_client=source_blob_client,
+        downloaded_data=data[:3],
+        blob_properties=sample_properties,
+    )
+    try:
+        with open(temp_file_name, "rb") as temp_file:
+            assert temp_file.read() == data
+    finally:
+        os.remove(temp_file_name)
+    assert sorted(source_blob_client.range_requests) == [3, 7]
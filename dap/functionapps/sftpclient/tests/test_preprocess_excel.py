@@ -0,0 +1,189 @@
+import io
+import json
+import openpyxl
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+import preprocess.preprocess_excel as preprocess_excel
+from common.exception_handlers import InvalidHeaderCountException
+from conftest import FakeContainerClient
+
+log_activity_completion = preprocess_excel.log_activity_completion
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Id", "Name"])
+    for i in range(5):
+        sheet.append([i, f"name {i}"])
+    file_path = tmp_path / "genco.xlsx"
+    workbook.save(file_path)
+    return str(file_path)
+
+
+@pytest.fixture(autouse=True)
+def no_side_effects(monkeypatch):
+    monkeypatch.setattr(preprocess_excel, "read_scenarios_configs", lambda f: {})
+    monkeypatch.setattr(preprocess_excel, "get_source_file_prefix", lambda **k: "p")
+    monkeypatch.setattr(preprocess_excel, "send_message_to_queue", lambda message: None)
+    monkeypatch.setattr(preprocess_excel, "log_activity_completion", lambda **k: None)
+
+
+def convert(workbook_path: str, engine: str, source_name: str, **options) -> dict:
+    """Convert the workbook and return the blobs written."""
+    container_client = FakeContainerClient()
+    file_configs = [
+        {
+            "file_config": {"file_pattern_name": "genco_pattern"},
+            "file_type_config": {"header_row": 1, "reader_engine": engine, **options},
+        }
+    ]
+    preprocess_excel.preprocess_excel_file(
+        container_client,
+        "genco_pattern",
+        file_configs,
+        workbook_path,
+        "20240101000000000",
+        None,
+        "genco.xlsx",
+        activity_type="process_excel",
+        activity_run_id=1,
+        logging_completed=False,
+        source_name=source_name,
+    )
+    return container_client.store
+
+
+def read_output(store: dict) -> pa.Table:
+    return pq.read_table(io.BytesIO(store["genco_20240101000000000.parquet"]))
+
+
+@pytest.mark.parametrize("source_name", ["genco", "other"])
+def test_calamine_matches_pandas(workbook_path, source_name):
+    pandas_table = read_output(convert(workbook_path, "pandas", source_name))
+    calamine_table = read_output(convert(workbook_path, "calamine", source_name))
+
+    assert calamine_table.schema.names == pandas_table.schema.names
+    assert calamine_table.drop_columns(
+        [name for name in pandas_table.schema.names if name.startswith("da_")]
+    ).equals(
+        pandas_table.drop_columns(
+            [name for name in pandas_table.schema.names if name.startswith("da_")]
+        )
+    )
+
+
+def test_genco_keeps_source_columns(workbook_path):
+    table = read_output(convert(workbook_path, "calamine", "genco"))
+
+    assert table.schema.names == ["Id", "Name"]
+
+
+@pytest.mark.parametrize("engine", ["pandas", "calamine"])
+def test_rolled_over_output_is_named_by_its_first_part(
+    workbook_path, monkeypatch, engine
+):
+    activity_ends, messages = [], []
+    monkeypatch.setattr(
+        preprocess_excel, "log_activity_completion", log_activity_completion
+    )
+    monkeypatch.setattr(
+        preprocess_excel, "log_activity_end", lambda **k: activity_ends.append(k)
+    )
+    monkeypatch.setattr(
+        preprocess_excel,
+        "send_message_to_queue",
+        lambda message: messages.append(message),
+    )
+    store = convert(workbook_path, engine, "other", parquet_writer={"part_max_rows": 2})
+
+    part_names = sorted(store)
+    assert part_names == [
+        f"genco_20240101000000000_part-{part:04d}.parquet" for part in (1, 2, 3)
+    ]
+    activity_ref_details = json.loads(activity_ends[0]["activity_ref_details"])
+    assert activity_ends[0]["target_file_name"] == part_names[0]
+    assert activity_ref_details["parquet_file_name"] == part_names[0]
+    assert activity_ref_details["parquet_file_names"] == part_names
+    assert messages[0]["source_file_name"] == part_names[0]
+    assert messages[0]["source_file_names"] == part_names
+
+
+@pytest.mark.parametrize("engine", ["pandas", "calamine"])
+def test_failed_sheet_rolls_back_the_other_sheets(tmp_path, monkeypatch, engine):
+    workbook = openpyxl.Workbook()
+    for sheet_name in ("first", "second"):
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(["Id", "Name"])
+        sheet.append([1, "name"])
+    counted = workbook.create_sheet("counted")
+    counted.append(["No of records: 5"])
+    counted.append(["Id", "Name"])
+    counted.append([1, "name"])
+    file_path = tmp_path / "sheets.xlsx"
+    workbook.save(file_path)
+
+    logged_errors = []
+    monkeypatch.setattr(
+        preprocess_excel,
+        "read_scenarios_configs",
+        lambda f: {
+            "record_count": {
+                "type": "multiple_rows",
+                "multiple_rows": {
+                    "rows": [
+                        {
+                            "row": 1,
+                            "expected_keywords": ["no of records"],
+                            "extraction_type": "expected_count",
+                        }
+                    ]
+                },
+            }
+        },
+    )
+    monkeypatch.setattr(
+        preprocess_excel,
+        "handle_logging_error",
+        lambda *args: logged_errors.append(args[-2:]),
+    )
+    container_client = FakeContainerClient()
+    file_configs = [
+        {
+            "file_config": {"file_pattern_name": "sheets_pattern"},
+            "file_type_config": {
+                "reader_engine": engine,
+                "sheets": [
+                    {"sheet_name": "first"},
+                    {"sheet_name": "second"},
+                    {
+                        "sheet_name": "counted",
+                        "header_row": 2,
+                        "metadata": "record_count",
+                        "validate_count": True,
+                        "condition": "header_count",
+                    },
+                ],
+            },
+        }
+    ]
+
+    with pytest.raises(InvalidHeaderCountException):
+        preprocess_excel.preprocess_excel_file(
+            container_client,
+            "sheets_pattern",
+            file_configs,
+            str(file_path),
+            "20240101000000000",
+            None,
+            "sheets.xlsx",
+            activity_type="process_excel",
+            activity_run_id=1,
+            logging_completed=False,
+            source_name="other",
+        )
+
+    assert container_client.store == {}
+    assert logged_errors == [("header_count", 5)]
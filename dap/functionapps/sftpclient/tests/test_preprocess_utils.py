@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+from common.exception_handlers import InvalidHeaderCountException
+from preprocess.utils import count_csv_records, precheck_file_metadata
+
+
+def write_csv(tmp_path, content: bytes) -> str:
+    file_path = tmp_path / "data.csv"
+    file_path.write_bytes(content)
+    return str(file_path)
+
+
+def test_count_csv_records_skips_breaks_in_quoted_fields(tmp_path):
+    file_path = write_csv(tmp_path, b'id,note\n1,"two\nlines"\n2,"say ""hi"""\n\n3,x\n')
+
+    assert count_csv_records(file_path) == 4
+    assert len(pd.read_csv(file_path)) == 3
+
+
+def test_count_csv_records_gives_up_on_literal_quotes(tmp_path):
+    file_path = write_csv(tmp_path, b'id,size\na,5" x\nb,6" y\nc,7\n')
+
+    assert count_csv_records(file_path) is None
+
+
+def test_precheck_accepts_literal_inch_mark_quotes(tmp_path):
+    file_path = write_csv(tmp_path, b'id,size\na,5" x\nb,6" y\nc,7\n')
+
+    precheck_file_metadata("header_count", 3, file_path, ",", 1, 2, "data.csv")
+    assert len(pd.read_csv(file_path)) == 3
+
+
+def test_precheck_rejects_clear_count_mismatch(tmp_path):
+    file_path = write_csv(tmp_path, b'id,size\na,"5"\nb,"6"\nc,7\n')
+
+    with pytest.raises(InvalidHeaderCountException):
+        precheck_file_metadata("header_count", 5, file_path, ",", 1, 2, "data.csv")
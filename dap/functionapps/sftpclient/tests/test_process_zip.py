@@ -0,0 +1,133 @@
+import threading
+from concurrent.futures import CancelledError
+from types import SimpleNamespace
+import pytest
+import process.process_zip as process_zip_module
+from common.exception_handlers import (
+    FileValidationException,
+    InvalidFileCompressionException,
+)
+from common.zip_session import MemoryBudget, corrupt_member_exception
+
+TIMEOUT = 5
+
+
+class WaitSignallingCondition(threading.Condition):
+    """Condition releasing a semaphore each time a thread starts waiting on it."""
+
+    def __init__(self):
+        super().__init__()
+        self.waiting = threading.Semaphore(0)
+
+    def wait(self, timeout=None):
+        self.waiting.release()
+        return super().wait(timeout)
+
+
+class ObservedMemoryBudget(MemoryBudget):
+    """Budget signalling when a member waits for memory and when it closes."""
+
+    def __init__(self, limit):
+        super().__init__(limit)
+        self._condition = WaitSignallingCondition()
+        self.waiting = self._condition.waiting
+        self.closing = threading.Event()
+
+    def close(self):
+        super().close()
+        self.closing.set()
+
+
+class FakeZipSession:
+    zip_ref = SimpleNamespace(getinfo=lambda file_name: SimpleNamespace(file_size=1))
+
+    def member(self, file_name):
+        return file_name
+
+
+def run_process_zip(members, zip_session=None):
+    process_zip_module.process_zip(
+        source_type="SFTP",
+        zip_session=zip_session,
+        zip_file_name="archive.zip",
+        destination_container_path="container",
+        destination_connection_string="connection",
+        file_pattern_name="zip_pattern",
+        file_configs=[],
+        timestamp="20240101000000000",
+        parquet_flag="true",
+        valid_members={name: "pattern" for name in members},
+        source_name="source",
+    )
+
+
+def test_process_zip_raises_the_first_failure(monkeypatch):
+    def process_zip_member(file_name, memory_budget, **kwargs):
+        if file_name == "late.csv":
+            assert memory_budget.closing.wait(TIMEOUT)
+        raise ValueError(file_name)
+
+    monkeypatch.setattr(process_zip_module, "ZIP_MAX_WORKERS", 2)
+    monkeypatch.setattr(process_zip_module, "MemoryBudget", ObservedMemoryBudget)
+    monkeypatch.setattr(process_zip_module, "process_zip_member", process_zip_member)
+
+    with pytest.raises(ValueError, match="early.csv"):
+        run_process_zip(["late.csv", "early.csv"])
+
+
+def test_process_zip_cancels_members_waiting_for_memory(monkeypatch):
+    started = []
+
+    def process_zip_member(file_name, memory_budget, **kwargs):
+        with memory_budget.reserve(memory_budget.limit):
+            started.append(file_name)
+            for _ in range(2):
+                assert memory_budget.waiting.acquire(timeout=TIMEOUT)
+            raise ValueError(file_name)
+
+    monkeypatch.setattr(process_zip_module, "ZIP_MAX_WORKERS", 3)
+    monkeypatch.setattr(process_zip_module, "MemoryBudget", ObservedMemoryBudget)
+    monkeypatch.setattr(process_zip_module, "process_zip_member", process_zip_member)
+
+    with pytest.raises(ValueError):
+        run_process_zip(["first.csv", "second.csv", "third.csv"])
+    assert len(started) == 1
+
+
+def test_process_zip_rejects_a_corrupt_member(monkeypatch):
+    def upload_file_to_blob(directory, **kwargs):
+        if directory == "corrupt.csv":
+            raise corrupt_member_exception(directory, ValueError("Bad CRC-32"))
+        raise FileValidationException("Summary count mismatch", reject_file=True)
+
+    monkeypatch.setattr(process_zip_module, "retrieve_activity_id", lambda **_: 1)
+    monkeypatch.setattr(process_zip_module, "log_activity_start", lambda **_: 1)
+    monkeypatch.setattr(process_zip_module, "update_file_name", lambda **_: "out.csv")
+    monkeypatch.setattr(process_zip_module, "get_output_client", lambda **_: None)
+    monkeypatch.setattr(process_zip_module, "upload_file_to_blob", upload_file_to_blob)
+
+    run_process_zip(["rejected.csv"], zip_session=FakeZipSession())
+    with pytest.raises(InvalidFileCompressionException, match="corrupt.csv"):
+        run_process_zip(["rejected.csv", "corrupt.csv"], zip_session=FakeZipSession())
+
+
+def test_closed_memory_budget_cancels_waiting_reservations():
+    memory_budget = ObservedMemoryBudget(10)
+    errors = []
+
+    def wait_for_memory():
+        try:
+            with memory_budget.reserve(10):
+                pass
+        except CancelledError as e:
+            errors.append(e)
+
+    with memory_budget.reserve(10):
+        waiter = threading.Thread(target=wait_for_memory)
+        waiter.start()
+        assert memory_budget.waiting.acquire(timeout=TIMEOUT)
+        memory_budget.close()
+        waiter.join(timeout=TIMEOUT)
+
+    assert len(errors) == 1
+    assert memory_budget.reserved == 0
@@ -0,0 +1,44 @@
+import re
+import zipfile
+import openpyxl
+import pandas as pd
+import pytest
+from validations.utils import has_consistent_field_count, read_excel_preview
+
+
+def test_read_excel_preview_pads_rows_wider_than_the_header(tmp_path):
+    workbook = openpyxl.Workbook()
+    workbook.active.append(["a", "b"])
+    workbook.active.append([1, 2, 3])
+    workbook.active.append([4])
+    saved_path = tmp_path / "saved.xlsx"
+    workbook.save(saved_path)
+
+    # Without its dimension the read-only rows are as wide as their cells
+    file_path = tmp_path / "no_dimension.xlsx"
+    with zipfile.ZipFile(saved_path) as source, zipfile.ZipFile(
+        file_path, "w"
+    ) as target:
+        for member in source.infolist():
+            data = source.read(member.filename)
+            if member.filename == "xl/worksheets/sheet1.xml":
+                data = re.sub(rb"<dimension[^>]*/>", b"", data)
+            target.writestr(member, data)
+
+    preview = read_excel_preview(str(file_path), "no_dimension.xlsx")
+
+    assert preview.shape == pd.read_excel(file_path).shape == (2, 3)
+    assert preview.iloc[0].tolist() == [1, 2, 3]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('id,note\n1,"a,b"\n2,"two\nlines"\n3,"say ""hi"""\n', True),
+        ('id,size\na,5" x\nb,6" y\n', True),
+        ("id,note\n1,a,b\n2,c\n", False),
+        ("id\n1\n2\n", False),
+    ],
+)
+def test_has_consistent_field_count(text, expected):
+    assert has_consistent_field_count(text, ",") is expected
@@ -1,10 +1,21 @@
 import re
 import csv
+import codecs
+import zlib
 import chardet
-from io import BytesIO
-from typing import Dict
+from io import BytesIO, StringIO
+from itertools import islice
+from typing import Dict, Iterable, Optional
+import openpyxl
 import pandas as pd
 import pyzipper
+import xlrd
+from common.zip_session import ZipSession, corrupt_member_exception
+from common.constants import (
+    CSV_DIALECT_CHECK_ROWS,
+    ENCODING_DETECTION_SAMPLE_SIZE,
+    EXCEL_PREVIEW_ROWS,
+)
 from common.exception_handlers import (
     CSVFileCorruptionException,
     EmptyFileException,
@@ -14,6 +25,8 @@ from common.exception_handlers import (
     InvalidFileEncodingException,
     InvalidFileNameException,
     InvalidZIPFileNameException,
+    UnsupportedFileTypeException,
+    FileSizeLimitExceededException,
 )
 
 
@@ -32,13 +45,40 @@ def file_empty_check(size: int, file_name: str) -> Dict:
     return {"value": "", "success": True}
 
 
+def validate_file_type(
+    file_type: str, supported_file_types: Iterable[str], file_name: str
+) -> Dict:
+    """
+    Validate if there is a handler for the file type
+    """
+    if file_type not in supported_file_types:
+        raise UnsupportedFileTypeException(
+            message=f"Failed: Unsupported file type {file_type} for file {file_name}",
+            reject_file=True,
+            additional_details={"file_name": file_name, "file_type": file_type},
+        )
+    return {"value": file_type, "success": True}
+
+
+def validate_file_size(size: int, max_size: int, file_name: str) -> Dict:
+    """
+    Validate if file is within the size limit, a max_size of 0 disables the check
+    """
+    if max_size and size > max_size:
+        raise FileSizeLimitExceededException(
+            message=f"Warning: File {file_name} of {size} bytes exceeds the size limit of {max_size} bytes",
+            reject_file=True,
+            additional_details={"size": size, "max_size": max_size},
+        )
+    return {"value": "", "success": True}
+
+
 def validate_excel_empty_check(
-    source_blob_size: int, file: BytesIO, file_name: str
+    source_blob_size: int, df: pd.DataFrame, file_name: str
 ) -> Dict:
     """
     Helper function to check excel type.
     """
-    df = pd.read_excel(file, nrows=5)
     if df.empty or source_blob_size == 0:
         raise EmptyFileException(
             message=f"Warning: File {file_name} is empty",
@@ -67,13 +107,41 @@ def validate_csv_file(file: BytesIO, file_name: str, delimiter: str = ",") -> Di
     return {"value": "", "success": True}
 
 
-def validate_excel_file(file: BytesIO, file_name: str) -> Dict:
+def read_excel_preview(
+    file_path: str, file_name: str, row_count: int = EXCEL_PREVIEW_ROWS
+) -> pd.DataFrame:
     """
-    Helper function to check excel type.
+    Read the header and first rows of the first sheet once for the excel
+    validations. An xlsx workbook is opened with openpyxl in read-only mode,
+    which streams only the rows read from the sheet, an xls workbook with
+    xlrd loading sheets on demand. A workbook that cannot be read is
+    rejected as corrupt.
     """
     try:
-        pd.read_excel(file, nrows=5)
-    except (pd.errors.XLRDError, ValueError) as e:
+        if file_name.lower().endswith(".xls"):
+            workbook = xlrd.open_workbook(file_path, on_demand=True)
+            try:
+                sheet = workbook.sheet_by_index(0)
+                rows = [
+                    sheet.row_values(i) for i in range(min(row_count + 1, sheet.nrows))
+                ]
+            finally:
+                workbook.release_resources()
+        else:
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                rows = list(
+                    workbook.worksheets[0].iter_rows(
+                        max_row=row_count + 1, values_only=True
+                    )
+                )
+            finally:
+                workbook.close()
+        # Rows of a read-only sheet are as wide as their last cell, not the sheet
+        width = max((len(row) for row in rows), default=0)
+        rows = [list(row) + [None] * (width - len(row)) for row in rows]
+        return pd.DataFrame(rows[1:], columns=rows[0] if rows else None)
+    except Exception as e:
         raise ExcelFileCorruptionException(
             message=f"Warning: File {file_name} is not a valid excel file, error: {str(e)}",
             reject_file=True,
@@ -82,7 +150,6 @@ def validate_excel_file(file: BytesIO, file_name: str) -> Dict:
                 "error": "File is not a valid Excel format",
             },
         )
-    return {"value": "", "success": True}
 
 
 def file_name_validation_l1(file_configs: list, file_name: str) -> Dict:
@@ -124,10 +191,15 @@ def file_name_validation_l2(file_configs: list, file_name: str) -> Dict:
 
 
 def validate_csv_delimiter(
-    file_sample: bytes, file_name: str, file_pattern_name: str, file_configs: list
+    file_sample: bytes,
+    file_name: str,
+    file_pattern_name: str,
+    file_configs: list,
+    file_text: Optional[str] = None,
 ) -> Dict:
     """
-    Helper function for CSV Delimter validation
+    Helper function for CSV Delimter validation, file_text is the already
+    decoded sample when the caller has one
     """
     default_delimiter = ","
     default_header_row = 1
@@ -141,15 +213,19 @@ def validate_csv_delimiter(
             if file_type_config:
                 delimiter = file_type_config.get("delimiter", default_delimiter)
                 header_row = file_type_config.get("header_row", default_header_row)
-            sniffer = csv.Sniffer()
-            encoding = chardet.detect(file_sample)["encoding"]
-            file_sample_decoded = file_sample.decode(encoding)
+            file_sample_decoded = file_text
+            if file_sample_decoded is None:
+                encoding = detect_sample_encoding(file_sample)
+                file_sample_decoded = file_sample.decode(encoding, errors="replace")
             file_lines = file_sample_decoded.splitlines()
             if header_row:
                 file_lines_without_metadata = "\n".join(file_lines[header_row - 1 :])
             else:
                 header_row = file_type_config.get("data_start_row")
                 file_lines_without_metadata = "\n".join(file_lines[header_row:])
+            if has_consistent_field_count(file_lines_without_metadata, delimiter):
+                return {"value": delimiter, "success": True}
+            sniffer = csv.Sniffer()
             detected_delimiter = sniffer.sniff(file_lines_without_metadata).delimiter
             if detected_delimiter == delimiter:
                 return {"value": detected_delimiter, "success": True}
@@ -164,13 +240,49 @@ def validate_csv_delimiter(
             )
 
 
-def validate_file_compression(source_file: str, file_name: str) -> Dict:
+def detect_sample_encoding(file_sample: bytes) -> str:
+    """
+    Detect the encoding of a file sample. A strict UTF-8 decode is tried
+    first, the sample may end mid-character so it is decoded incrementally,
+    and chardet only runs on a bounded prefix when that fails.
+    """
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(file_sample, final=False)
+        return "utf-8-sig" if file_sample.startswith(codecs.BOM_UTF8) else "utf-8"
+    except UnicodeDecodeError:
+        encoding = chardet.detect(file_sample[:ENCODING_DETECTION_SAMPLE_SIZE])
+        return encoding["encoding"] or "latin-1"
+
+
+def has_consistent_field_count(text: str, delimiter: str) -> bool:
     """
-    To Check if the files is a valid zip
+    Check that the first CSV_DIALECT_CHECK_ROWS rows of the text all split
+    into the same number of fields, more than one, with the delimiter. The
+    last row is left out when the text may have been cut short in it.
+    The rows are split with csv.reader, which reads quotes as pandas does:
+    delimiters and line breaks inside quoted fields, doubled quotes, and a
+    quote inside an unquoted field read as a literal character. A count of
+    the delimiters per line cannot follow that last case, and csv.reader
+    stops after the rows checked rather than scanning the whole sample.
+    """
+    rows = list(
+        islice(
+            csv.reader(StringIO(text), delimiter=delimiter), CSV_DIALECT_CHECK_ROWS + 1
+        )
+    )
+    if len(rows) <= CSV_DIALECT_CHECK_ROWS:
+        rows = rows[:-1]
+    field_counts = {len(row) for row in rows if row}
+    return len(field_counts) == 1 and field_counts.pop() > 1
+
+
+def validate_file_compression(zip_session: ZipSession, file_name: str) -> Dict:
+    """
+    To Check if the files is a valid zip, the CRC of each member is checked
+    when the member is read
     """
     try:
-        with pyzipper.AESZipFile(source_file, "r") as zf:
-            zf.testzip()
+        zip_session.zip_ref
         return {"value": "", "success": True}
 
     except (pyzipper.BadZipFile, pyzipper.LargeZipFile) as e:
@@ -181,6 +293,18 @@ def validate_file_compression(source_file: str, file_name: str) -> Dict:
         )
 
 
+def read_member_sample(zip_session: ZipSession, member: str, file_name: str) -> bytes:
+    """
+    Read the sample of a zip member, a member that fits in the sample has
+    its CRC checked here
+    """
+    try:
+        return zip_session.read_sample(member)
+
+    except (pyzipper.BadZipFile, zlib.error) as e:
+        raise corrupt_member_exception(file_name, e)
+
+
 def validate_csv_file_encoding(file: BytesIO, file_name: str) -> Dict:
     """
     Validate CSV file encoding.
@@ -199,18 +323,19 @@ def validate_csv_file_encoding(file: BytesIO, file_name: str) -> Dict:
     return {"value": "", "success": True}
 
 
-def validate_excel_file_encoding(file: BytesIO, file_name: str) -> Dict:
+def validate_excel_file_encoding(df: pd.DataFrame, file_name: str) -> Dict:
     """
-    Validate Excel file encoding.
+    Validate Excel file encoding, the header and cells are joined and encoded
+    in a single pass which fails on any string that is not valid UTF-8.
     """
-    df = pd.read_excel(file, nrows=5)
-    for column in df.columns:
-        for value in df[column]:
-            if isinstance(value, str):
-                if value.encode("utf-8").decode("utf-8") != value:
-                    raise InvalidFileEncodingException(
-                        message=f"Warning: File {file_name} is not encoded in UTF-8",
-                        reject_file=True,
-                        additional_details={"file_name": file_name},
-                    )
+    try:
+        "\x00".join(
+            [*df.columns.astype(str), *df.astype(str).to_numpy().ravel()]
+        ).encode("utf-8")
+    except UnicodeEncodeError:
+        raise InvalidFileEncodingException(
+            message=f"Warning: File {file_name} is not encoded in UTF-8",
+            reject_file=True,
+            additional_details={"file_name": file_name},
+        )
     return {"value": "", "success": True}
@@ -0,0 +1,135 @@
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterable, Optional
+from validations.utils import (
+    detect_sample_encoding,
+    file_empty_check,
+    file_name_validation_l1,
+    file_name_validation_l2,
+    read_excel_preview,
+    validate_csv_delimiter,
+    validate_csv_file,
+    validate_excel_empty_check,
+    validate_excel_file_encoding,
+    validate_file_compression,
+    validate_file_size,
+    validate_file_type,
+)
+from common.constants import VALIDATION_SAMPLE_SIZE
+
+
+def read_file_sample(file_path: str) -> bytes:
+    """Read the leading bytes of the file used by the content validations."""
+    with open(file_path, "rb") as file_data:
+        return file_data.read(VALIDATION_SAMPLE_SIZE)
+
+
+# Artifacts of a file the checks can require, each loader receives the
+# function that loads the other artifacts it is built from
+ARTIFACT_LOADERS: Dict[str, Callable[[Callable[[str], Any]], Any]] = {
+    "file_type": lambda load: load("file_name").split(".")[-1],
+    "file_sample": lambda load: read_file_sample(load("file_path")),
+    "file_text": lambda load: load("file_sample").decode(
+        detect_sample_encoding(load("file_sample")), errors="replace"
+    ),
+    "excel_preview": lambda load: read_excel_preview(
+        load("file_path"), load("file_name")
+    ),
+}
+
+# Checks with the artifacts or check results passed to them, in argument
+# order, and their relative cost including loading what they require
+VALIDATION_CHECKS: Dict[str, Dict[str, Any]] = {
+    "validate_file_type": {
+        "check": validate_file_type,
+        "requires": ("file_type", "supported_file_types", "file_name"),
+        "cost": 0,
+    },
+    "file_name_validation_l1": {
+        "check": file_name_validation_l1,
+        "requires": ("file_configs", "file_name"),
+        "cost": 0,
+    },
+    "file_name_validation_l2": {
+        "check": file_name_validation_l2,
+        "requires": ("file_configs", "file_name"),
+        "cost": 0,
+    },
+    "file_empty_check": {
+        "check": file_empty_check,
+        "requires": ("file_size", "file_name"),
+        "cost": 0,
+    },
+    "validate_file_size": {
+        "check": validate_file_size,
+        "requires": ("file_size", "max_file_size", "file_name"),
+        "cost": 0,
+    },
+    "validate_csv_delimiter": {
+        "check": validate_csv_delimiter,
+        "requires": (
+            "file_sample",
+            "file_name",
+            "file_name_validation_l2",
+            "file_configs",
+            "file_text",
+        ),
+        "cost": 2,
+    },
+    "validate_csv_file": {
+        "check": lambda file_sample, file_name, delimiter: validate_csv_file(
+            BytesIO(file_sample), file_name, delimiter
+        ),
+        "requires": ("file_sample", "file_name", "validate_csv_delimiter"),
+        "cost": 3,
+    },
+    "validate_excel_empty_check": {
+        "check": validate_excel_empty_check,
+        "requires": ("file_size", "excel_preview", "file_name"),
+        "cost": 3,
+    },
+    "validate_excel_file_encoding": {
+        "check": validate_excel_file_encoding,
+        "requires": ("excel_preview", "file_name"),
+        "cost": 3,
+    },
+    "validate_file_compression": {
+        "check": validate_file_compression,
+        "requires": ("zip_session", "file_name"),
+        "cost": 1,
+    },
+}
+
+
+def run_validations(
+    check_names: Iterable[str],
+    context: Dict[str, Any],
+    results: Dict[str, Any],
+    loaders: Optional[Dict[str, Callable[[Callable[[str], Any]], Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Run the named checks cheapest first against a context shared by all of
+    them. An artifact or check result a check requires is loaded on first
+    use and kept in the context, so each is computed once per file, and the
+    first rejection raised stops the run. The value of every check that
+    passes is recorded in results.
+    """
+    artifact_loaders = {**ARTIFACT_LOADERS, **(loaders or {})}
+
+    def load(name: str) -> Any:
+        if name not in context:
+            if name in VALIDATION_CHECKS:
+                validation_check = VALIDATION_CHECKS[name]
+                result = validation_check["check"](
+                    *[load(required) for required in validation_check["requires"]]
+                )
+                results[name] = result.get("value")
+                context[name] = result.get("value")
+            else:
+                context[name] = artifact_loaders[name](load)
+        return context[name]
+
+    for check_name in sorted(
+        check_names, key=lambda check_name: VALIDATION_CHECKS[check_name]["cost"]
+    ):
+        load(check_name)
+    return results
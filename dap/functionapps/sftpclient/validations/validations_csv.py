@@ -1,11 +1,4 @@
-from io import BytesIO
-from validations.utils import (
-    file_empty_check,
-    validate_csv_delimiter,
-    validate_csv_file,
-    file_name_validation_l2,
-    validate_csv_file_encoding,
-)
+from validations.validation_engine import run_validations
 from common.constants import (
     LOG_ACTIVITY_END_SUCCESS,
     LOG_ACTIVITY_END_FAILED,
@@ -51,34 +44,26 @@ def execute_validations_csv(
             source_file_name=source_file_name,
         )
 
-        with open(temp_file_name, "rb") as file_data:
-            fd_sample = file_data.read(2 * 1024 * 1024)
-            fd_sample_b_io = BytesIO(fd_sample)
         results = {}
-
-        validations = [
-            (file_name_validation_l2, (file_configs, source_file_name)),
-            (file_empty_check, (source_blob_size, source_file_name)),
-            # (validate_csv_file_encoding, (fd_sample_b_io, source_file_name)),
-        ]
-
-        for validation_func, args in validations:
-            result = validation_func(*args)
-            results[validation_func.__name__] = result.get("value")
-
-        file_pattern_name = results.get("file_name_validation_l2", None)
-        validate_csv_delimiter_result = validate_csv_delimiter(
-            fd_sample, source_file_name, file_pattern_name, file_configs
-        )
-        validate_csv_file(
-            file=fd_sample_b_io,
-            file_name=source_file_name,
-            delimiter=validate_csv_delimiter_result.get("value"),
+        run_validations(
+            check_names=[
+                "file_name_validation_l2",
+                "file_empty_check",
+                "validate_csv_delimiter",
+                "validate_csv_file",
+            ],
+            context={
+                "file_name": source_file_name,
+                "file_size": source_blob_size,
+                "file_configs": file_configs,
+                "file_path": temp_file_name,
+            },
+            results=results,
         )
 
+        file_pattern_name = results.get("file_name_validation_l2", None)
         if not logging_completed:
             all_validations = list(results.keys())
-            all_validations.extend(["validate_csv_delimiter", "validate_csv_file"])
             activity_ref_details = create_activity_ref_details(
                 activity_type=activity_type,
                 zip_file_name=None,
@@ -1,10 +1,4 @@
-from io import BytesIO
-from validations.utils import (
-    validate_excel_empty_check,
-    file_name_validation_l2,
-    validate_excel_file,
-    validate_excel_file_encoding,
-)
+from validations.validation_engine import run_validations
 from common.constants import (
     LOG_ACTIVITY_END_SUCCESS,
     LOG_ACTIVITY_END_FAILED,
@@ -50,24 +44,21 @@ def execute_validations_excel(
             source_file_name=source_file_name,
         )
 
-        with open(temp_file_name, "rb") as file_data:
-            fd_sample = file_data.read(2 * 1024 * 1024)
-            fd_sample_b_io = BytesIO(fd_sample)
         results = {}
-
-        validations = [
-            (file_name_validation_l2, (file_configs, source_file_name)),
-            (
-                validate_excel_empty_check,
-                (source_blob_size, fd_sample_b_io, source_file_name),
-            ),
-            (validate_excel_file_encoding, (fd_sample_b_io, source_file_name)),
-            (validate_excel_file, (fd_sample_b_io, source_file_name)),
-        ]
-
-        for validation_func, args in validations:
-            result = validation_func(*args)
-            results[validation_func.__name__] = result.get("value")
+        run_validations(
+            check_names=[
+                "file_name_validation_l2",
+                "validate_excel_empty_check",
+                "validate_excel_file_encoding",
+            ],
+            context={
+                "file_name": source_file_name,
+                "file_size": source_blob_size,
+                "file_configs": file_configs,
+                "file_path": temp_file_name,
+            },
+            results=results,
+        )
 
         file_pattern_name = results["file_name_validation_l2"]
         if not logging_completed:
@@ -0,0 +1,148 @@
+from typing import Iterable
+from validations.validation_engine import run_validations
+from common.constants import (
+    LOG_ACTIVITY_END_FAILED,
+    INSTANCE_TYPE,
+    MAX_SOURCE_FILE_SIZE,
+    ActivityTypes,
+)
+from common.audit_logger import (
+    retrieve_activity_id,
+    log_activity_end,
+    log_activity_start,
+    log_activity_error,
+)
+from common.logger_utils import logger
+from common.helper_utils import create_activity_ref_details
+from common.exception_handlers import FileValidationException
+
+
+def execute_validations_pre_download(
+    source_type: str,
+    source_name: str,
+    source_file_name: str,
+    source_blob_size: int,
+    file_configs: list,
+    supported_file_types: Iterable[str],
+) -> None:
+    """
+    Validations on the blob listing metadata, run before the blob is
+    downloaded or decrypted. Only a rejection is logged as a validations
+    activity, files that pass are logged by the file type validations.
+    """
+    results = {}
+    try:
+        source_file_type = source_file_name.split(".")[-1]
+        run_validations(
+            check_names=[
+                "validate_file_type",
+                (
+                    "file_name_validation_l1"
+                    if source_file_type == "zip"
+                    else "file_name_validation_l2"
+                ),
+                "file_empty_check",
+                "validate_file_size",
+            ],
+            context={
+                "file_name": source_file_name,
+                "file_type": source_file_type,
+                "file_size": source_blob_size,
+                "file_configs": file_configs,
+                "supported_file_types": supported_file_types,
+                "max_file_size": MAX_SOURCE_FILE_SIZE,
+            },
+            results=results,
+        )
+
+    except FileValidationException as e:
+        logger.error(
+            "Pre-download validations failed for file %s: %s",
+            source_file_name,
+            e.details.get("error"),
+        )
+        log_rejection(
+            source_type=source_type,
+            source_name=source_name,
+            source_file_name=source_file_name,
+            error_string=e.details.get("error"),
+            results=results,
+        )
+        raise e
+
+
+def execute_validations_csv_probe(
+    source_type: str,
+    source_name: str,
+    source_file_name: str,
+    file_sample: bytes,
+    file_configs: list,
+) -> None:
+    """
+    Content validations for a plaintext CSV run on the leading bytes fetched
+    with a single ranged request, so a malformed file is rejected before the
+    full download. Only a rejection is logged as a validations activity.
+    """
+    results = {}
+    try:
+        run_validations(
+            check_names=[
+                "file_name_validation_l2",
+                "validate_csv_delimiter",
+                "validate_csv_file",
+            ],
+            context={
+                "file_name": source_file_name,
+                "file_configs": file_configs,
+                "file_sample": file_sample,
+            },
+            results=results,
+        )
+
+    except FileValidationException as e:
+        logger.error(
+            "Probe validations failed for file %s: %s",
+            source_file_name,
+            e.details.get("error"),
+        )
+        log_rejection(
+            source_type=source_type,
+            source_name=source_name,
+            source_file_name=source_file_name,
+            error_string=e.details.get("error"),
+            results=results,
+        )
+        raise e
+
+
+def log_rejection(
+    source_type: str,
+    source_name: str,
+    source_file_name: str,
+    error_string: str,
+    results: dict,
+) -> None:
+    """Log a validations activity for a file rejected before download."""
+    activity_type = ActivityTypes.VALIDATIONS.value
+    activity_id = retrieve_activity_id(
+        activity_type=activity_type, instance_type=INSTANCE_TYPE
+    )
+    activity_run_id = log_activity_start(
+        activity_id=activity_id,
+        instance_type=INSTANCE_TYPE,
+        source_name=source_name,
+        source_type=source_type,
+        source_file_name=source_file_name,
+    )
+    log_activity_error(activity_run_id=activity_run_id, error_log=error_string)
+    activity_ref_details = create_activity_ref_details(
+        activity_type=activity_type,
+        zip_file_name=None,
+        file_name=source_file_name,
+        validations=list(results.keys()),
+    )
+    log_activity_end(
+        activity_run_id=activity_run_id,
+        run_status=LOG_ACTIVITY_END_FAILED,
+        activity_ref_details=activity_ref_details,
+    )
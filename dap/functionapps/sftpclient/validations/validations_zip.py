@@ -1,15 +1,6 @@
 import os
-from io import BytesIO
-import pyzipper
-from validations.utils import (
-    validate_csv_delimiter,
-    validate_file_compression,
-    file_empty_check,
-    validate_csv_file_encoding,
-    file_name_validation_l1,
-    file_name_validation_l2,
-    validate_csv_file,
-)
+from validations.validation_engine import run_validations
+from validations.utils import read_member_sample
 from common.constants import (
     LOG_ACTIVITY_END_SUCCESS,
     LOG_ACTIVITY_END_FAILED,
@@ -24,6 +15,7 @@ from common.audit_logger import (
 )
 from common.logger_utils import logger
 from common.helper_utils import create_activity_ref_details
+from common.zip_session import ZipSession
 from common.exception_handlers import FileValidationException, raise_error
 
 
@@ -31,12 +23,12 @@ def execute_validations_zip(
     source_type: str,
     source_name: str,
     source_file_name: str,
-    temp_file_name: str,
+    zip_session: ZipSession,
     source_blob_size: int,
     file_configs: list,
-) -> tuple[str, str, list, bool]:
+) -> tuple[str, dict, bool]:
     """
-    Validations for ZIP
+    Validations for ZIP, the valid members are indexed on the zip session
     """
     try:
         activity_type = ActivityTypes.VALIDATIONS.value
@@ -57,23 +49,27 @@ def execute_validations_zip(
         )
 
         results = {}
-
-        validations = [
-            (file_name_validation_l1, (file_configs, source_file_name)),
-            (validate_file_compression, (temp_file_name, source_file_name)),
-            (file_empty_check, (source_blob_size, source_file_name)),
-        ]
-
-        for validation_func, args in validations:
-            result = validation_func(*args)
-            results[validation_func.__name__] = result.get("value")
+        run_validations(
+            check_names=[
+                "file_name_validation_l1",
+                "validate_file_compression",
+                "file_empty_check",
+            ],
+            context={
+                "file_name": source_file_name,
+                "file_size": source_blob_size,
+                "file_configs": file_configs,
+                "zip_session": zip_session,
+            },
+            results=results,
+        )
 
         file_pattern_name = results["file_name_validation_l1"]
-        valid_csv_file, validation_status = execute_validations_zip_l2(
+        valid_members, validation_status = execute_validations_zip_l2(
             source_name=source_name,
             source_type=source_type,
             file_configs=file_configs,
-            source_file=temp_file_name,
+            zip_session=zip_session,
             zip_file_name=source_file_name,
         )
 
@@ -95,7 +91,7 @@ def execute_validations_zip(
         logger.info(
             "Completed %s activity for zip file: %s", activity_type, source_file_name
         )
-        return (file_pattern_name, valid_csv_file, validation_status)
+        return (file_pattern_name, valid_members, validation_status)
 
     except FileValidationException as e:
         handle_logging_error(
@@ -127,119 +123,89 @@ def execute_validations_zip_l2(
     source_name: str,
     source_type: str,
     file_configs: list,
-    source_file: str,
+    zip_session: ZipSession,
     zip_file_name: str,
-) -> tuple[list, bool]:
+) -> tuple[dict, bool]:
     """
-    Validations for ZIP level 2 i.e files inside zip
+    Validations for ZIP level 2 i.e files inside zip, the sample read from a
+    member that passes is kept for its processing to continue from
     """
     activity_type = ActivityTypes.VALIDATIONS.value
 
-    valid_csv_files = []
-    with pyzipper.AESZipFile(source_file, "r") as zip_ref:
-        for file_name in zip_ref.namelist():
-            file_size = zip_ref.getinfo(file_name).file_size
-            directory = os.path.basename(file_name)
-            if not directory:
-                continue
-            with zip_ref.open(file_name) as file_data:
-                file_data_sample = file_data.read(2 * 1024 * 1024)
-                file_data_sample_bytesio = BytesIO(file_data_sample)
-            if directory:
-                logging_completed = False
-                activity_id = retrieve_activity_id(
-                    activity_type=activity_type, instance_type=INSTANCE_TYPE
-                )
-                activity_run_id = log_activity_start(
-                    activity_id=activity_id,
-                    instance_type=INSTANCE_TYPE,
-                    source_name=source_name,
-                    source_type=source_type,
-                    source_file_name=file_name,
-                    zip_file_name=zip_file_name,
-                )
-
-                results = {}
-                validations = {
-                    "file_name_validation_l2": lambda dir=directory: file_name_validation_l2(
-                        file_configs=file_configs, file_name=dir
-                    ),
-                    "file_empty_check": lambda fsize=file_size, dir=directory: file_empty_check(
-                        size=fsize, file_name=dir
-                    ),
-                    # "validate_csv_file_encoding": lambda sample_bytesio=file_data_sample_bytesio, dir= directory: validate_csv_file_encoding(
-                    #     file=sample_bytesio, file_name=dir
-                    # ),
-                    "validate_csv_delimiter": lambda sample=file_data_sample, fname=file_name, res=results: validate_csv_delimiter(
-                        file_sample=sample,
-                        file_name=fname,
-                        file_pattern_name=res.get("file_name_validation_l2"),
-                        file_configs=file_configs,
-                    ),
-                    "validate_csv_file": lambda sample_bytesio=file_data_sample_bytesio, dir=directory, res=results: validate_csv_file(
-                        file=sample_bytesio,
-                        file_name=dir,
-                        delimiter=res.get("validate_csv_delimiter"),
-                    ),
-                }
+    for zip_info in zip_session.members():
+        file_name = zip_info.filename
+        logging_completed = False
+        activity_id = retrieve_activity_id(
+            activity_type=activity_type, instance_type=INSTANCE_TYPE
+        )
+        activity_run_id = log_activity_start(
+            activity_id=activity_id,
+            instance_type=INSTANCE_TYPE,
+            source_name=source_name,
+            source_type=source_type,
+            source_file_name=file_name,
+            zip_file_name=zip_file_name,
+        )
 
-                for field, validation_func in validations.items():
-                    try:
-                        result = validation_func()
-                        if result["success"]:
-                            results[field] = result["value"]
-                            continue
-                        logger.error(
-                            error_string=f"For {zip_file_name}: {result['message']}"
-                        )
-                        handle_logging_error(
-                            activity_run_id=activity_run_id,
-                            activity_type=activity_type,
-                            zip_file_name=zip_file_name,
-                            file_name=file_name,
-                            error_string=result["message"],
-                            results=results,
-                            logging_completed=logging_completed,
-                        )
-                        logging_completed = True
-                        break
-                    except FileValidationException as e:
-                        handle_logging_error(
-                            activity_run_id=activity_run_id,
-                            activity_type=activity_type,
-                            zip_file_name=zip_file_name,
-                            file_name=file_name,
-                            error_string=e.details.get("error"),
-                            results=results,
-                            logging_completed=logging_completed,
-                        )
-                        logging_completed = True
-                        break
-                if not logging_completed:
-                    activity_ref_details = create_activity_ref_details(
-                        activity_type=activity_type,
-                        zip_file_name=zip_file_name,
-                        file_name=file_name,
-                        validations=list(results.keys()),
-                    )
-                    log_activity_end(
-                        activity_run_id=activity_run_id,
-                        run_status=LOG_ACTIVITY_END_SUCCESS,
-                        activity_ref_details=activity_ref_details,
-                        target_file_name=file_name,
+        results = {}
+        try:
+            # The member is only read once the name and size checks pass
+            run_validations(
+                check_names=[
+                    "file_name_validation_l2",
+                    "file_empty_check",
+                    "validate_csv_delimiter",
+                    "validate_csv_file",
+                ],
+                context={
+                    "file_name": os.path.basename(file_name),
+                    "file_size": zip_info.file_size,
+                    "file_configs": file_configs,
+                    "zip_session": zip_session,
+                    "member_name": file_name,
+                },
+                results=results,
+                loaders={
+                    "file_sample": lambda load: read_member_sample(
+                        load("zip_session"), load("member_name"), load("file_name")
                     )
-                    logging_completed = True
-                    valid_file_element = {
-                        "file_name": file_name,
-                        "file_pattern_name": results.get("file_name_validation_l2"),
-                    }
-                    valid_csv_files.append(valid_file_element)
-        if len(valid_csv_files) > 0:
-            return (valid_csv_files, True)
-        raise FileValidationException(
-            message=f"No valid files found in ZIP file: {zip_file_name}",
-            reject_file=True,
-        )
+                },
+            )
+        except FileValidationException as e:
+            zip_session.release(file_name)
+            handle_logging_error(
+                activity_run_id=activity_run_id,
+                activity_type=activity_type,
+                zip_file_name=zip_file_name,
+                file_name=file_name,
+                error_string=e.details.get("error"),
+                results=results,
+                logging_completed=logging_completed,
+            )
+            logging_completed = True
+        if not logging_completed:
+            activity_ref_details = create_activity_ref_details(
+                activity_type=activity_type,
+                zip_file_name=zip_file_name,
+                file_name=file_name,
+                validations=list(results.keys()),
+            )
+            log_activity_end(
+                activity_run_id=activity_run_id,
+                run_status=LOG_ACTIVITY_END_SUCCESS,
+                activity_ref_details=activity_ref_details,
+                target_file_name=file_name,
+            )
+            logging_completed = True
+            zip_session.valid_members[file_name] = results.get(
+                "file_name_validation_l2"
+            )
+    if len(zip_session.valid_members) > 0:
+        return (zip_session.valid_members, True)
+    raise FileValidationException(
+        message=f"No valid files found in ZIP file: {zip_file_name}",
+        reject_file=True,
+    )
 
 
 def handle_logging_error(
@@ -1,16 +1,110 @@
 import base64
+import io
 import json
-import os
 import re
-import tempfile
-from typing import Any, Dict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional
+import numpy as np
 import pandas as pd
-from azure.storage.blob import ContainerClient
+import pyarrow as pa
+import pyarrow.parquet as pq
+from azure.storage.blob import BlobClient, BlobBlock, ContainerClient
 from azure.storage.queue import QueueClient
 from common.logger_utils import logger
 from common.helper_utils import raise_error
 from common.connection_manager import IZ_STAGING_ADLS_CONNECTION_STRING
-from common.constants import STAGING_ADLS_QUEUE_NAME
+from common.constants import (
+    AUDIT_COLUMNS_MODE,
+    PARQUET_DEFAULT_ROW_GROUP_SIZE,
+    PARQUET_WRITER_OPTIONS,
+    PARQUET_WRITER_OPTION_KEYS,
+    STAGING_ADLS_QUEUE_NAME,
+    STRING_DTYPE,
+    UPLOAD_BLOCK_SIZE,
+    UPLOAD_MAX_CONCURRENCY,
+)
+
+
+class BlockBlobWriter(io.RawIOBase):
+    """
+    Writable file-like sink for a block blob.
+    Written bytes are cut into blocks of UPLOAD_BLOCK_SIZE which are staged on
+    a thread pool while the caller keeps writing, at most
+    UPLOAD_MAX_CONCURRENCY blocks are in flight at a time. The block list is
+    committed when the context manager exits cleanly or finalize is called,
+    on error the staged blocks are never committed and the blob is left
+    untouched.
+    """
+
+    def __init__(
+        self,
+        blob_client: BlobClient,
+        block_size: int = UPLOAD_BLOCK_SIZE,
+        max_concurrency: int = UPLOAD_MAX_CONCURRENCY,
+    ):
+        super().__init__()
+        self.blob_client = blob_client
+        self.block_size = block_size
+        self.max_concurrency = max_concurrency
+        self.buffer = bytearray()
+        self.block_ids = []
+        self.staged_blocks = deque()
+        self.bytes_written = 0
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.finalize(commit=exc_type is None)
+
+    def finalize(self, commit: bool = True) -> None:
+        """Commit the blob, or discard the staged blocks, and release the pool."""
+        try:
+            if commit:
+                self.commit()
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=not commit)
+            self.close()
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.bytes_written
+
+    def write(self, data: bytes) -> int:
+        self.buffer += data
+        self.bytes_written += len(data)
+        while len(self.buffer) >= self.block_size:
+            self.stage_block(bytes(self.buffer[: self.block_size]))
+            del self.buffer[: self.block_size]
+        return len(data)
+
+    def stage_block(self, data: bytes) -> None:
+        """Stage a block in the background, waiting while too many are in flight."""
+        block_id = base64.b64encode(f"{len(self.block_ids):08d}".encode()).decode()
+        self.block_ids.append(block_id)
+        self.staged_blocks.append(
+            self.executor.submit(self.blob_client.stage_block, block_id, data)
+        )
+        while self.staged_blocks and (
+            self.staged_blocks[0].done()
+            or len(self.staged_blocks) > self.max_concurrency
+        ):
+            self.staged_blocks.popleft().result()
+
+    def commit(self) -> None:
+        """Upload the remaining bytes and commit the staged block list."""
+        if not self.block_ids:
+            self.blob_client.upload_blob(bytes(self.buffer), overwrite=True)
+            return
+        if self.buffer:
+            self.stage_block(bytes(self.buffer))
+            self.buffer.clear()
+        while self.staged_blocks:
+            self.staged_blocks.popleft().result()
+        self.blob_client.commit_block_list(
+            [BlobBlock(block_id=block_id) for block_id in self.block_ids]
+        )
 
 
 def standardize_dataframe_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -57,6 +151,20 @@ def standardize_dataframe_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def repeat_string(value: str, length: int) -> pd.api.extensions.ExtensionArray:
+    """Return an Arrow-backed string array holding value length times."""
+    return pd.array(
+        pa.repeat(pa.scalar(value, pa.large_string()), length), dtype=STRING_DTYPE
+    )
+
+
+def repeat_category(value: str, length: int) -> pd.Categorical:
+    """Return a single-entry categorical holding value length times."""
+    categories = pd.Index([] if value is None else [value], dtype=STRING_DTYPE)
+    codes = np.full(length, -1 if value is None else 0, dtype=np.int8)
+    return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories))
+
+
 def add_audit_columns(
     df: pd.DataFrame,
     ingestion_time: str,
@@ -64,30 +172,209 @@ def add_audit_columns(
     zip_file_name: str,
     parquet_blob_name: str,
 ) -> pd.DataFrame:
-    """Add audit columns to the DataFrame."""
+    """
+    Add audit columns to the DataFrame. Depending on AUDIT_COLUMNS_MODE they
+    are added as string columns, as single-entry dictionary columns, or kept
+    in df.attrs to be written once as parquet key-value metadata.
+    """
+
+    audit_columns = {
+        "da_ingestion_time": ingestion_time,
+        "da_src_filename": org_file_name,
+        "da_src_zip_filename": zip_file_name,
+        "da_filename": parquet_blob_name,
+    }
+    if AUDIT_COLUMNS_MODE.lower() == "metadata":
+        df.attrs["parquet_metadata"] = {
+            key: value or "" for key, value in audit_columns.items()
+        }
+        return df
 
-    df["da_ingestion_time"] = ingestion_time
-    df["da_src_filename"] = org_file_name
-    df["da_src_zip_filename"] = zip_file_name
-    df["da_filename"] = parquet_blob_name
+    repeat_value = (
+        repeat_category if AUDIT_COLUMNS_MODE.lower() == "dictionary" else repeat_string
+    )
+    row_count = len(df)
+    for column, value in audit_columns.items():
+        df[column] = repeat_value(value, row_count)
     return df
 
 
+def to_arrow_table(df: pd.DataFrame, schema: pa.Schema = None) -> pa.Table:
+    """
+    Convert the DataFrame to an Arrow table, attaching the key-value metadata
+    kept in df.attrs by add_audit_columns to the table schema.
+    """
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    parquet_metadata = df.attrs.get("parquet_metadata")
+    if parquet_metadata:
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), **parquet_metadata}
+        )
+    return table
+
+
+def get_parquet_writer_options(file_type_config: Optional[dict]) -> Dict[str, Any]:
+    """
+    Merge the "parquet_writer" options of the file pattern over the default
+    PARQUET_WRITER_OPTIONS profile, dropping options the writer does not take.
+    """
+    writer_options = {
+        **PARQUET_WRITER_OPTIONS,
+        **(file_type_config or {}).get("parquet_writer", {}),
+    }
+    use_dictionary = writer_options.get("use_dictionary")
+    if AUDIT_COLUMNS_MODE.lower() == "dictionary" and isinstance(use_dictionary, list):
+        writer_options["use_dictionary"] = use_dictionary + [
+            "da_ingestion_time",
+            "da_src_filename",
+            "da_src_zip_filename",
+            "da_filename",
+        ]
+    unsupported_options = set(writer_options) - set(PARQUET_WRITER_OPTION_KEYS)
+    if unsupported_options:
+        logger.warning(
+            "Ignoring unsupported parquet writer options: %s",
+            ", ".join(sorted(unsupported_options)),
+        )
+    return {
+        key: value
+        for key, value in writer_options.items()
+        if key in PARQUET_WRITER_OPTION_KEYS
+    }
+
+
+def get_parquet_stats(
+    parquet_file_names: list[str],
+    metadata: list[pq.FileMetaData],
+    parquet_file_size: int,
+    writer_options: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Summarise the written parquet parts for the activity run log."""
+    uncompressed_size = sum(
+        part.row_group(i).column(j).total_uncompressed_size
+        for part in metadata
+        for i in range(part.num_row_groups)
+        for j in range(part.num_columns)
+    )
+    return {
+        "row_count": sum(part.num_rows for part in metadata),
+        "parquet_file_size": parquet_file_size,
+        "uncompressed_size": uncompressed_size,
+        "compression": str(writer_options.get("compression", "snappy")),
+        "parquet_file_names": parquet_file_names,
+    }
+
+
+def get_part_blob_name(parquet_blob_name: str, part_number: int) -> str:
+    """Return the blob name of a numbered part of the parquet output."""
+    return f'{parquet_blob_name.rsplit(".", 1)[0]}_part-{part_number:04d}.parquet'
+
+
 def write_parquet_file(
-    container_client: ContainerClient, df: pd.DataFrame, parquet_blob_name: str
-) -> int:
-    """Write DataFrame to a Parquet file and upload to Azure Blob Storage."""
-    row_count = len(df)
-    with tempfile.NamedTemporaryFile(suffix=".parquet", delete=False) as tp:
-        temp_parquet_name = tp.name
-        df.to_parquet(temp_parquet_name, engine="pyarrow")
-        parquet_blob_client = container_client.get_blob_client(parquet_blob_name)
-        with open(temp_parquet_name, "rb") as data:
-            parquet_blob_client.upload_blob(data, overwrite=True)
-
-    os.remove(temp_parquet_name)
-    logger.info(f"Parquet file '{parquet_blob_name}' uploaded successfully to blob.")
-    return row_count
+    container_client: ContainerClient,
+    df: pd.DataFrame,
+    parquet_blob_name: str,
+    writer_options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Write DataFrame as Parquet straight into Azure Blob Storage, staging
+    blocks while the file is being encoded.
+    """
+    return write_parquet_batches(
+        container_client, [df], parquet_blob_name, writer_options
+    )
+
+
+def write_parquet_batches(
+    container_client: ContainerClient,
+    batches: Iterable[pd.DataFrame],
+    parquet_blob_name: str,
+    writer_options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Write DataFrame batches as row groups of Parquet straight into Azure Blob
+    Storage. The schema is taken from the first batch, which is stable across
+    batches as every column has an Arrow-backed dtype.
+    When "part_max_size" or "part_max_rows" is set, the output rolls over to
+    a new _part-NNNN.parquet blob once a part reaches either threshold, the
+    size being checked after every row group. If the batches raise, the open
+    part is never committed and the parts already written are deleted.
+    """
+    writer_options = dict(writer_options or {})
+    row_group_size = writer_options.pop("row_group_size", None)
+    part_max_size = writer_options.pop("part_max_size", 0)
+    part_max_rows = writer_options.pop("part_max_rows", 0)
+    is_rolling = bool(part_max_size or part_max_rows)
+    write_rows = row_group_size or PARQUET_DEFAULT_ROW_GROUP_SIZE
+
+    parquet_file_names = []
+    parquet_file_size = 0
+    metadata_collector = []
+    schema = sink = parquet_writer = None
+    part_rows = 0
+
+    def close_part():
+        nonlocal sink, parquet_writer, parquet_file_size
+        parquet_writer.close()
+        sink.finalize()
+        parquet_file_size += sink.bytes_written
+        sink = parquet_writer = None
+
+    try:
+        for df in batches:
+            table = to_arrow_table(df, schema)
+            schema = table.schema
+            offset = 0
+            while offset < table.num_rows or (
+                parquet_writer is None and not parquet_file_names
+            ):
+                if parquet_writer is None:
+                    part_name = (
+                        get_part_blob_name(
+                            parquet_blob_name, len(parquet_file_names) + 1
+                        )
+                        if is_rolling
+                        else parquet_blob_name
+                    )
+                    parquet_file_names.append(part_name)
+                    sink = BlockBlobWriter(container_client.get_blob_client(part_name))
+                    parquet_writer = pq.ParquetWriter(
+                        sink,
+                        schema,
+                        metadata_collector=metadata_collector,
+                        **writer_options,
+                    )
+                    part_rows = 0
+
+                length = write_rows
+                if part_max_rows:
+                    length = min(length, part_max_rows - part_rows)
+                chunk = table.slice(offset, length)
+                parquet_writer.write_table(chunk, row_group_size=row_group_size)
+                offset += chunk.num_rows
+                part_rows += chunk.num_rows
+
+                if (part_max_rows and part_rows >= part_max_rows) or (
+                    part_max_size and sink.bytes_written >= part_max_size
+                ):
+                    close_part()
+        if parquet_writer is not None:
+            close_part()
+    except Exception:
+        if sink is not None:
+            sink.finalize(commit=False)
+            parquet_file_names.pop()
+        for part_name in parquet_file_names:
+            container_client.delete_blob(part_name)
+        raise
+
+    parquet_stats = get_parquet_stats(
+        parquet_file_names, metadata_collector, parquet_file_size, writer_options
+    )
+    logger.info(
+        f"Parquet file '{parquet_blob_name}' uploaded successfully to blob: {parquet_stats}"
+    )
+    return parquet_stats
 
 
 def send_message_to_queue(message: Dict[str, Any]) -> None:
@@ -6,9 +6,15 @@ from writers.utils import (
     send_message_to_queue,
     standardize_dataframe_columns,
     add_audit_columns,
+    get_parquet_writer_options,
     write_parquet_file,
 )
-from preprocess.preprocess_csv import preprocess_csv_file
+from preprocess.preprocess_csv import (
+    get_csv_config,
+    is_csv_streaming_enabled,
+    preprocess_csv_file,
+    preprocess_csv_file_streaming,
+)
 from preprocess.preprocess_excel import preprocess_excel_file
 from common.constants import LOG_ACTIVITY_END_SUCCESS
 from common.audit_logger import log_activity_end
@@ -16,12 +22,13 @@ from common.logger_utils import logger
 from common.helper_utils import create_activity_ref_details, raise_error
 from common.exception_handlers import FileValidationException
 from common.connection_manager import get_source_file_prefix
+from common.zip_session import FileSource, get_file_source_path
 
 
 def write_parquet(
     container_client: ContainerClient,
     file_name: str,
-    temp_file_name: str,
+    temp_file_name: FileSource,
     timestamp: str,
     zip_file_name: str,
     org_file_name: str,
@@ -30,7 +37,8 @@ def write_parquet(
     **kwargs: Any,
 ) -> None:
     """
-    Convert csv to parquet and write to blob
+    Convert csv to parquet and write to blob, a csv member of a zip is read
+    as a stream and an excel member is spilled to disk
     """
     try:
         activity_type = kwargs.get("activity_type")
@@ -49,24 +57,46 @@ def write_parquet(
                 "%Y-%m-%d %H:%M:%S"
             )
             parquet_blob_name = f'{file_name.rsplit(".",1)[0]}.parquet'
-            df, expected_count, condition, logging_completed = preprocess_csv_file(
-                file_path=temp_file_name,
-                file_configs=file_configs,
-                file_pattern_name=file_pattern_name,
-                org_file_name=org_file_name,
-                zip_file_name=zip_file_name,
-                activity_type=activity_type,
-                activity_run_id=activity_run_id,
-                logging_completed=logging_completed,
-            )
+            if is_csv_streaming_enabled(file_configs, file_pattern_name):
+                parquet_stats, expected_count, condition, logging_completed = (
+                    preprocess_csv_file_streaming(
+                        container_client=container_client,
+                        file_path=temp_file_name,
+                        file_configs=file_configs,
+                        file_pattern_name=file_pattern_name,
+                        org_file_name=org_file_name,
+                        zip_file_name=zip_file_name,
+                        ingestion_time=ingestion_time,
+                        parquet_blob_name=parquet_blob_name,
+                        activity_type=activity_type,
+                        activity_run_id=activity_run_id,
+                        logging_completed=logging_completed,
+                    )
+                )
+            else:
+                df, expected_count, condition, logging_completed = preprocess_csv_file(
+                    file_path=temp_file_name,
+                    file_configs=file_configs,
+                    file_pattern_name=file_pattern_name,
+                    org_file_name=org_file_name,
+                    zip_file_name=zip_file_name,
+                    activity_type=activity_type,
+                    activity_run_id=activity_run_id,
+                    logging_completed=logging_completed,
+                )
 
-            df = add_audit_columns(
-                df, ingestion_time, org_file_name, zip_file_name, parquet_blob_name
-            )
-            standardized_df = standardize_dataframe_columns(df=df)
-            row_count = write_parquet_file(
-                container_client, standardized_df, parquet_blob_name
-            )
+                df = add_audit_columns(
+                    df, ingestion_time, org_file_name, zip_file_name, parquet_blob_name
+                )
+                standardized_df = standardize_dataframe_columns(df=df)
+                parquet_stats = write_parquet_file(
+                    container_client,
+                    standardized_df,
+                    parquet_blob_name,
+                    get_parquet_writer_options(
+                        get_csv_config(file_configs, file_pattern_name)
+                    ),
+                )
             if not logging_completed:
                 counts = get_file_counts(condition, expected_count)
                 summary_count = counts.get("summary_count")
@@ -76,23 +106,24 @@ def write_parquet(
                     activity_type=activity_type,
                     zip_file_name=zip_file_name,
                     file_name=org_file_name,
-                    parquet_file_name=parquet_blob_name,
+                    parquet_file_name=parquet_stats["parquet_file_names"][0],
                     validation_condition=condition,
                     summary_count=summary_count,
                     header_count=header_count,
-                    row_count=row_count,
+                    **parquet_stats,
                     is_split_file=is_split_file,
                 )
                 log_activity_end(
                     activity_run_id=activity_run_id,
                     run_status=LOG_ACTIVITY_END_SUCCESS,
                     activity_ref_details=activity_ref_details,
-                    target_file_name=parquet_blob_name,
+                    target_file_name=parquet_stats["parquet_file_names"][0],
                 )
                 logging_completed = True
                 send_message_to_queue(
                     message={
-                        "source_file_name": parquet_blob_name,
+                        "source_file_name": parquet_stats["parquet_file_names"][0],
+                        "source_file_names": parquet_stats["parquet_file_names"],
                         "source_file_prefix": source_file_prefix,
                         "source_name": source_name,
                         "split_file": is_split_file,
@@ -107,7 +138,7 @@ def write_parquet(
                 container_client=container_client,
                 file_pattern_name=file_pattern_name,
                 file_configs=file_configs,
-                temp_file_name=temp_file_name,
+                temp_file_name=get_file_source_path(temp_file_name),
                 timestamp=timestamp,
                 zip_file_name=zip_file_name,
                 org_file_name=org_file_name,